@@ -4,16 +4,17 @@ Cloud Function Entry Point for GitHub Stats Collector
 This function is triggered by Cloud Scheduler every hour to collect
 GitHub statistics and publish them to BigQuery via GCS.
 """
-import os
+import base64
+import time
 import logging
 from datetime import datetime, timezone, timedelta
 import functions_framework
-from flask import jsonify
-
-# Import from parent directory
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import orjson
+from flask import Response
 
+# config/modules/utils are staged into this directory at deploy time
+# (see deployment/deploy.sh), so they import as regular siblings without
+# any sys.path mutation.
 from config import Config
 from modules.collector import GitHubCollector
 
@@ -25,6 +26,132 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _json_response(payload, status: int = 200) -> Response:
+    """Serialize a response dict with orjson (datetime-aware, returns bytes)"""
+    return Response(
+        orjson.dumps(payload, option=orjson.OPT_UTC_Z),
+        status=status,
+        mimetype='application/json'
+    )
+
+
+# Module-level singletons so warm invocations reuse the config and the
+# BigQuery/GCS/GitHub clients (and their underlying connections) instead
+# of paying client construction cost on every request.
+_config = None
+_collector = None
+
+
+def _get_collector() -> GitHubCollector:
+    """Return the shared collector, creating it on first use"""
+    global _config, _collector
+    if _collector is None:
+        _config = Config.from_env()
+        _collector = GitHubCollector(_config)
+    return _collector
+
+
+# Build the singletons at import time so the cost lands in the cold start
+# rather than the first request. Fall back to lazy init inside the
+# handlers if the environment isn't ready yet.
+try:
+    _get_collector()
+    # Warm up the pooled GitHub session so the TCP+TLS handshake (and
+    # congestion-window growth) is paid once per container, not on the
+    # first real API call of each invocation.
+    _collector.github_client.get_rate_limit_status()
+    # Same idea for the google-cloud clients: a cheap metadata get opens
+    # the underlying connection now, so the first insert/upload of a
+    # request doesn't absorb the multi-second handshake.
+    _collector.bq_client.get_dataset(_config.bigquery_dataset_id)
+    if _collector.storage:
+        _collector.storage.bucket.reload()
+except Exception as e:
+    logger.warning(f"Deferring collector initialization: {e}")
+
+# Timestamp of the last successful schema initialization; warm
+# invocations within the TTL skip the BigQuery metadata round-trips.
+_BQ_INITIALIZED = 0.0
+
+# Flipped True once the collector singleton and the BigQuery schema are
+# ready; healthz reports it so probes don't route work to an instance
+# that is still initializing.
+_READY = False
+
+
+def _ensure_bq(collector: GitHubCollector, ttl: float = 300.0):
+    """Initialize BigQuery schema at most once per TTL window"""
+    global _BQ_INITIALIZED
+    now = time.monotonic()
+    if _BQ_INITIALIZED and now - _BQ_INITIALIZED < ttl:
+        return
+    collector.initialize_bigquery()
+    _BQ_INITIALIZED = now
+    global _READY
+    _READY = True
+
+
+def _run_collection(since, until, repo_filter=None, collection_id=None,
+                    resume=False) -> dict:
+    """Run a collection with the shared collector and return row counts"""
+    collector = _get_collector()
+
+    # Ensure BigQuery schema is initialized (no-op on warm invocations)
+    try:
+        _ensure_bq(collector)
+    except Exception as e:
+        logger.warning(f"Schema initialization warning (may already exist): {e}")
+
+    logger.info(f"Collecting data from {since} to {until}")
+    return collector.collect_and_publish(
+        since=since,
+        until=until,
+        repo_filter=repo_filter,
+        collection_id=collection_id or until.isoformat(),
+        resume=resume
+    )
+
+
+@functions_framework.http
+def healthz(request):
+    """
+    Readiness probe.
+
+    Returns 200 once the collector singleton exists and the BigQuery
+    schema has been initialized, 503 while the instance is still
+    starting up. Deploy with --min-instances=1 (see deployment/README.md)
+    and point startup probes here so traffic only reaches instances
+    that can actually process work.
+    """
+    global _READY
+    if not _READY:
+        try:
+            _ensure_bq(_get_collector())
+        except Exception as e:
+            logger.warning(f"Readiness check failed: {e}")
+            return ('initializing', 503)
+    return ('ok', 200)
+
+
+@functions_framework.http
+def warmup(request):
+    """
+    Lightweight keep-warm endpoint.
+
+    Point a frequent (e.g. every 5 minutes) Cloud Scheduler job at this
+    function to keep a container warm, avoiding the multi-second cold
+    start (client construction + gRPC handshakes) on the real
+    collection runs.
+    """
+    try:
+        collector = _get_collector()
+        # Touch the storage client so its connection stays established
+        _ = collector.storage.bucket if collector.storage else None
+    except Exception as e:
+        logger.warning(f"Warmup initialization failed: {e}")
+    return ('', 204)
+
+
 @functions_framework.http
 def collect_github_stats(request):
     """
@@ -40,42 +167,30 @@ def collect_github_stats(request):
     Returns:
         JSON response with collection statistics
     """
+    # Keep-warm pings shouldn't trigger a real collection
+    if request.headers.get('X-Warmup'):
+        return warmup(request)
+
     try:
         logger.info("Starting GitHub stats collection")
-        
-        # Load configuration from environment
-        config = Config.from_env()
-        logger.info(f"Configuration loaded for organization: {config.github_org}")
-        
-        # Create collector
-        collector = GitHubCollector(config)
-        
-        # Ensure BigQuery schema is initialized
-        try:
-            collector.initialize_bigquery()
-        except Exception as e:
-            logger.warning(f"Schema initialization warning (may already exist): {e}")
-        
+
         # Determine collection window
         # Collect last 2 hours to ensure no data is missed (with overlap)
         # The upsert logic will prevent duplicates
-        until = datetime.now(timezone.utc)
-        since = until - timedelta(hours=2)
-        
-        logger.info(f"Collecting data from {since} to {until}")
-        
-        # Perform collection with deduplication
-        counts = collector.collect_and_publish(
-            since=since,
-            until=until,
-            collection_id=until.isoformat(),
-            resume=False  # Don't resume in scheduled mode
-        )
-        
+        # Single timestamp per request: the collection window, the
+        # collection_id derived from it, and the response timestamp all
+        # agree exactly instead of drifting by a few milliseconds.
+        now = datetime.now(timezone.utc)
+        until = now
+        since = now - timedelta(hours=2)
+
+        counts = _run_collection(since, until)
+        config = _collector.config
+
         # Prepare response
         response = {
             "status": "success",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": now,
             "organization": config.github_org,
             "collection_window": {
                 "since": since.isoformat(),
@@ -86,23 +201,23 @@ def collect_github_stats(request):
         }
         
         logger.info(f"Collection complete: {counts}")
-        return jsonify(response), 200
+        return _json_response(response)
         
     except ValueError as e:
         logger.error(f"Configuration error: {e}")
-        return jsonify({
+        return _json_response({
             "status": "error",
             "error": "Configuration error",
             "message": str(e)
-        }), 500
+        }, status=500)
         
     except Exception as e:
         logger.error(f"Collection error: {e}", exc_info=True)
-        return jsonify({
+        return _json_response({
             "status": "error",
             "error": "Collection failed",
             "message": str(e)
-        }), 500
+        }, status=500)
 
 
 @functions_framework.http
@@ -120,9 +235,6 @@ def collect_github_stats_pubsub(request):
     """
     try:
         # Pub/Sub message is in request body
-        import json
-        import base64
-        
         envelope = request.get_json()
         if envelope and 'message' in envelope:
             message = envelope['message']
@@ -130,8 +242,12 @@ def collect_github_stats_pubsub(request):
                 data = base64.b64decode(message['data']).decode('utf-8')
                 logger.info(f"Received Pub/Sub message: {data}")
         
-        # Call the main collection function
-        result = collect_github_stats(request)
+        # Run the collection directly with the default window; the
+        # Pub/Sub request carries no query parameters to parse
+        until = datetime.now(timezone.utc)
+        since = until - timedelta(hours=2)
+        counts = _run_collection(since, until)
+        logger.info(f"Collection complete: {counts}")
         
         # For Pub/Sub, we just need to return 200
         return ('', 200)
@@ -173,50 +289,27 @@ def manual_trigger(request):
             repo_filter = [r.strip() for r in repos.split(',')]
             logger.info(f"Repository filter: {repo_filter}")
         
-        # Load configuration
-        config = Config.from_env()
-        logger.info(f"Configuration loaded for organization: {config.github_org}")
-        
-        # Create collector
-        collector = GitHubCollector(config)
-        
-        # Ensure BigQuery schema is initialized
-        try:
-            collector.initialize_bigquery()
-        except Exception as e:
-            logger.warning(f"Schema initialization warning: {e}")
-        
         # Determine collection window
-        until = datetime.now(timezone.utc)
-        since = until - timedelta(hours=hours)
-        
-        logger.info(f"Collecting data from {since} to {until}")
-        
-        # Perform collection
+        now = datetime.now(timezone.utc)
+        until = now
+        since = now - timedelta(hours=hours)
+
         if collection_id:
-            # Resume mode
             logger.info(f"Resuming collection: {collection_id}")
-            counts = collector.collect_and_publish(
-                since=since,
-                until=until,
-                repo_filter=repo_filter,
-                collection_id=collection_id,
-                resume=True
-            )
-        else:
-            # Normal collection
-            counts = collector.collect_and_publish(
-                since=since,
-                until=until,
-                repo_filter=repo_filter,
-                collection_id=until.isoformat(),
-                resume=False
-            )
-        
+
+        counts = _run_collection(
+            since,
+            until,
+            repo_filter=repo_filter,
+            collection_id=collection_id,
+            resume=bool(collection_id)
+        )
+        config = _collector.config
+
         # Prepare response
         response = {
             "status": "success",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": now,
             "organization": config.github_org,
             "collection_window": {
                 "since": since.isoformat(),
@@ -231,13 +324,13 @@ def manual_trigger(request):
         }
         
         logger.info(f"Manual collection complete: {counts}")
-        return jsonify(response), 200
+        return _json_response(response)
         
     except Exception as e:
         logger.error(f"Manual collection error: {e}", exc_info=True)
-        return jsonify({
+        return _json_response({
             "status": "error",
             "error": "Manual collection failed",
             "message": str(e)
-        }), 500
+        }, status=500)
 
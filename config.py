@@ -2,22 +2,33 @@
 Configuration for GitHub Stats Collector
 """
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# Cached result of Config.from_env() so repeated calls (every CLI
+# command and Cloud Function invocation) skip the env parsing.
+_CACHED: Optional["Config"] = None
 
 
 @dataclass
 class Config:
     """Main configuration class"""
     
-    # GitHub Configuration
+    # Required settings — dataclass fields without defaults must all
+    # precede the defaulted ones below
     github_token: str
+    bigquery_project_id: str
+
+    # GitHub Configuration
     github_org: str = "askscio"
-    
+    # All available tokens (GITHUB_TOKEN may be comma-separated); the
+    # client rotates across them to multiply the effective rate limit
+    github_tokens: List[str] = field(default_factory=list)
+
     # BigQuery Configuration
-    bigquery_project_id: str
     bigquery_dataset_id: str = "github_stats"
     bigquery_location: str = "US"
+    bq_insert_chunk_size: int = 500  # Rows per streaming insert request
     
     # GCS Configuration
     gcs_bucket_name: str = "github-stats-data"
@@ -26,10 +37,15 @@ class Config:
     # Rate Limiting Configuration
     max_requests_per_hour: int = 4500  # Conservative limit (5000 is GitHub's limit)
     rate_limit_buffer: float = 0.9  # Use 90% of available requests
+    # SQLite file for the ETag conditional-request cache (None disables it);
+    # 304 replies are free, so unchanged endpoints stop costing rate limit
+    etag_cache_path: Optional[str] = None
     
     # Parallelism Configuration
     max_workers: int = 10  # Number of parallel workers for fetching
     batch_size: int = 100  # Number of items to process in a batch
+    use_async_fetch: bool = False  # Use asyncio-based GitHub fetch fan-out
+    use_graphql: bool = False  # Fetch PRs via the GraphQL API (batched nested data)
     
     # Collection Configuration
     default_lookback_days: int = 180  # 6 months default for backfill
@@ -38,10 +54,15 @@ class Config:
     
     @classmethod
     def from_env(cls) -> "Config":
-        """Create config from environment variables"""
+        """Create config from environment variables (cached per process)"""
+        global _CACHED
+        if _CACHED is not None:
+            return _CACHED
+
         github_token = os.getenv("GITHUB_TOKEN")
         if not github_token:
             raise ValueError("GITHUB_TOKEN environment variable is required")
+        github_tokens = [t.strip() for t in github_token.split(',') if t.strip()]
         
         bigquery_project_id = os.getenv("BIGQUERY_PROJECT_ID")
         if not bigquery_project_id:
@@ -49,17 +70,23 @@ class Config:
         
         gcs_bucket_name = os.getenv("GCS_BUCKET_NAME", "github-stats-data")
         
-        return cls(
-            github_token=github_token,
+        _CACHED = cls(
+            github_token=github_tokens[0],
+            github_tokens=github_tokens,
             github_org=os.getenv("GITHUB_ORG", "askscio"),
             bigquery_project_id=bigquery_project_id,
             bigquery_dataset_id=os.getenv("BIGQUERY_DATASET_ID", "github_stats"),
             bigquery_location=os.getenv("BIGQUERY_LOCATION", "US"),
+            bq_insert_chunk_size=int(os.getenv("BQ_INSERT_CHUNK_SIZE", "500")),
             gcs_bucket_name=gcs_bucket_name,
             gcs_chunk_size=int(os.getenv("GCS_CHUNK_SIZE", "100")),
+            etag_cache_path=os.getenv("ETAG_CACHE_PATH") or None,
             max_workers=int(os.getenv("MAX_WORKERS", "10")),
             batch_size=int(os.getenv("BATCH_SIZE", "100")),
+            use_async_fetch=os.getenv("USE_ASYNC_FETCH", "false").lower() == "true",
+            use_graphql=os.getenv("USE_GRAPHQL", "false").lower() == "true",
             default_lookback_days=int(os.getenv("DEFAULT_LOOKBACK_DAYS", "180")),
             persist_to_gcs=os.getenv("PERSIST_TO_GCS", "true").lower() == "true",
         )
+        return _CACHED
 
@@ -14,6 +14,7 @@ ENTRY_POINT="collect_github_stats"
 MEMORY="${MEMORY:-512MB}"
 TIMEOUT="${TIMEOUT:-540s}"
 MAX_INSTANCES="${MAX_INSTANCES:-1}"
+MIN_INSTANCES="${MIN_INSTANCES:-1}"  # Keep one instance warm; set to 0 to allow scale-to-zero
 
 # Scheduler configuration
 SCHEDULE="${SCHEDULE:-0 * * * *}"  # Every hour
@@ -83,6 +84,7 @@ gcloud functions deploy "$FUNCTION_NAME" \
     --memory="$MEMORY" \
     --timeout="$TIMEOUT" \
     --max-instances="$MAX_INSTANCES" \
+    --min-instances="$MIN_INSTANCES" \
     --set-env-vars="GITHUB_TOKEN=$GITHUB_TOKEN,GITHUB_ORG=$GITHUB_ORG,BIGQUERY_PROJECT_ID=$PROJECT_ID,BIGQUERY_DATASET_ID=$BIGQUERY_DATASET_ID,GCS_BUCKET_NAME=$GCS_BUCKET_NAME,PERSIST_TO_GCS=true" \
     --project="$PROJECT_ID"
 
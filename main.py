@@ -6,13 +6,38 @@ This is the main entry point for the GitHub stats collector application.
 It supports different modes: initialization, backfill, and incremental collection.
 """
 import argparse
+import asyncio
 import logging
+import signal
 import sys
+import time
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 from config import Config
-from modules.collector import GitHubCollector
+
+if TYPE_CHECKING:
+    from modules.collector import GitHubCollector
+
+# Timestamp of the last successful schema initialization, so repeated
+# commands in the same process (e.g. the scheduled loop) skip the
+# BigQuery metadata round-trips.
+_BQ_INITIALIZED = 0.0
+
+
+def _ensure_bq(collector: "GitHubCollector", ttl: float = 300.0):
+    """Initialize BigQuery schema at most once per TTL window"""
+    global _BQ_INITIALIZED
+    now = time.monotonic()
+    if _BQ_INITIALIZED and now - _BQ_INITIALIZED < ttl:
+        return
+    collector.initialize_bigquery()
+    _BQ_INITIALIZED = now
+
+
+# datetime.fromisoformat accepts the 'Z' suffix natively on the
+# Pythons this runs on (3.11+), so no replace() shim is needed
+_parse_iso = datetime.fromisoformat
 
 
 def setup_logging(verbose: bool = False):
@@ -33,13 +58,15 @@ def initialize_command(config: Config):
     logger = logging.getLogger(__name__)
     logger.info("Initializing BigQuery schema...")
     
+    from modules.collector import GitHubCollector
     collector = GitHubCollector(config)
     collector.initialize_bigquery()
     
     logger.info("Initialization complete!")
 
 
-def backfill_command(config: Config, days: int, repos: Optional[str] = None):
+def backfill_command(config: Config, days: int, repos: Optional[str] = None,
+                     use_load_jobs: bool = False):
     """Backfill historical data"""
     logger = logging.getLogger(__name__)
     logger.info(f"Starting backfill for {days} days...")
@@ -49,13 +76,15 @@ def backfill_command(config: Config, days: int, repos: Optional[str] = None):
         repo_filter = [r.strip() for r in repos.split(',')]
         logger.info(f"Filtering repositories: {repo_filter}")
     
+    from modules.collector import GitHubCollector
     collector = GitHubCollector(config)
     
     # Ensure schema is initialized
-    collector.initialize_bigquery()
+    _ensure_bq(collector)
     
     # Run backfill
-    counts = collector.backfill(days=days, repo_filter=repo_filter)
+    counts = collector.backfill(days=days, repo_filter=repo_filter,
+                                use_load_jobs=use_load_jobs)
     
     logger.info("Backfill complete!")
     logger.info(f"Summary: {counts}")
@@ -74,10 +103,11 @@ def collect_command(config: Config,
         repo_filter = [r.strip() for r in repos.split(',')]
         logger.info(f"Filtering repositories: {repo_filter}")
     
+    from modules.collector import GitHubCollector
     collector = GitHubCollector(config)
     
     # Ensure schema is initialized
-    collector.initialize_bigquery()
+    _ensure_bq(collector)
     
     # Determine date range
     if hours:
@@ -88,11 +118,11 @@ def collect_command(config: Config,
         until_dt = None
         
         if since:
-            since_dt = datetime.fromisoformat(since.replace('Z', '+00:00'))
+            since_dt = _parse_iso(since)
             logger.info(f"Since: {since_dt}")
         
         if until:
-            until_dt = datetime.fromisoformat(until.replace('Z', '+00:00'))
+            until_dt = _parse_iso(until)
             logger.info(f"Until: {until_dt}")
         
         if not since_dt and not until_dt:
@@ -111,9 +141,68 @@ def collect_command(config: Config,
     logger.info(f"Summary: {counts}")
 
 
+async def _scheduled_loop(collector: "GitHubCollector", interval: int,
+                          repo_filter: Optional[list]):
+    """
+    Periodic collection on an asyncio loop with graceful shutdown
+
+    SIGINT/SIGTERM set a stop event instead of killing the process, so
+    an in-flight collection finishes its publish before exit. The sleep
+    itself is interruptible, so shutdown during the idle window is
+    immediate.
+    """
+    logger = logging.getLogger(__name__)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Signal handlers are unavailable on some platforms
+            pass
+    
+    def run_cycle():
+        # Re-warm connections that went idle during the sleep; stale
+        # gRPC channels otherwise pay a reconnect on the first real
+        # call of the cycle
+        try:
+            collector.github_client.get_rate_limit_status()
+            if collector.storage:
+                collector.storage.bucket.reload()
+        except Exception as e:
+            logger.debug(f"Connection re-warm failed: {e}")
+        
+        return collector.incremental_collect(hours=interval, repo_filter=repo_filter)
+    
+    # Schedule against fixed deadlines so each cycle's runtime doesn't
+    # push the next run later and later
+    interval_seconds = interval * 3600
+    next_run = loop.time() + interval_seconds
+    
+    while not stop.is_set():
+        logger.info("Starting collection cycle...")
+        try:
+            # Run the blocking collection off the loop so signals are
+            # still serviced while it's in flight
+            counts = await loop.run_in_executor(None, run_cycle)
+            logger.info(f"Collection cycle complete: {counts}")
+        except Exception as e:
+            logger.error(f"Error during collection cycle: {e}", exc_info=True)
+        
+        sleep_seconds = max(0, next_run - loop.time())
+        next_run += interval_seconds
+        logger.info(f"Sleeping {sleep_seconds:.0f}s until next cycle...")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=sleep_seconds)
+        except asyncio.TimeoutError:
+            pass
+    
+    logger.info("Scheduled collection stopped")
+
+
 def scheduled_command(config: Config, interval: int = 6, repos: Optional[str] = None):
     """Run collection on a scheduled interval"""
-    import time
     logger = logging.getLogger(__name__)
     
     repo_filter = None
@@ -121,32 +210,21 @@ def scheduled_command(config: Config, interval: int = 6, repos: Optional[str] =
         repo_filter = [r.strip() for r in repos.split(',')]
         logger.info(f"Filtering repositories: {repo_filter}")
     
+    from modules.collector import GitHubCollector
     collector = GitHubCollector(config)
     
     # Ensure schema is initialized
-    collector.initialize_bigquery()
+    _ensure_bq(collector)
     
     logger.info(f"Starting scheduled collection (every {interval} hours)")
     logger.info("Press Ctrl+C to stop")
     
-    try:
-        while True:
-            logger.info("Starting collection cycle...")
-            try:
-                counts = collector.incremental_collect(hours=interval, repo_filter=repo_filter)
-                logger.info(f"Collection cycle complete: {counts}")
-            except Exception as e:
-                logger.error(f"Error during collection cycle: {e}", exc_info=True)
-            
-            logger.info(f"Sleeping for {interval} hours...")
-            time.sleep(interval * 3600)
-    
-    except KeyboardInterrupt:
-        logger.info("Scheduled collection stopped by user")
+    asyncio.run(_scheduled_loop(collector, interval, repo_filter))
 
 
 def load_gcs_command(config: Config, repo: Optional[str] = None, 
-                    date: Optional[str] = None):
+                    date: Optional[str] = None,
+                    gcs_workers: Optional[int] = None):
     """Load data from GCS and publish to BigQuery"""
     logger = logging.getLogger(__name__)
     
@@ -154,19 +232,21 @@ def load_gcs_command(config: Config, repo: Optional[str] = None,
         logger.error("GCS persistence is not enabled. Set PERSIST_TO_GCS=true")
         sys.exit(1)
     
+    from modules.collector import GitHubCollector
     collector = GitHubCollector(config)
     
     # Ensure schema is initialized
-    collector.initialize_bigquery()
+    _ensure_bq(collector)
     
     logger.info("Loading data from GCS and publishing to BigQuery...")
-    counts = collector.load_from_gcs_and_publish(repo=repo, date_filter=date)
+    counts = collector.load_from_gcs_and_publish(repo=repo, date_filter=date,
+                                                 gcs_workers=gcs_workers)
     
     logger.info("Load complete!")
     logger.info(f"Summary: {counts}")
 
 
-def gcs_summary_command(config: Config):
+def gcs_summary_command(config: Config, no_cache: bool = False):
     """Show summary of data in GCS"""
     logger = logging.getLogger(__name__)
     
@@ -175,10 +255,11 @@ def gcs_summary_command(config: Config):
         sys.exit(1)
     
     from utils.storage import GCSStorage
+    from utils.storage_cache import get_data_summary_cached
     storage = GCSStorage(config.gcs_bucket_name, config.bigquery_project_id)
     
     logger.info("Fetching GCS data summary...")
-    summary = storage.get_data_summary(config.github_org)
+    summary = get_data_summary_cached(storage, config.github_org, refresh=no_cache)
     
     import json
     print("\n" + "="*80)
@@ -207,6 +288,10 @@ def wipe_gcs_command(config: Config, repo: str, confirm: bool = False):
     logger.warning(f"Deleting all data for {config.github_org}/{repo}...")
     count = storage.delete_repository_data(config.github_org, repo)
     
+    # Cached summaries are stale after a wipe
+    from utils.storage_cache import invalidate_summary_cache
+    invalidate_summary_cache(config.github_org)
+    
     logger.info(f"Deleted {count} files from GCS")
 
 
@@ -224,10 +309,11 @@ def resume_command(config: Config, collection_id: str, repos: Optional[str] = No
         repo_filter = [r.strip() for r in repos.split(',')]
         logger.info(f"Filtering repositories: {repo_filter}")
     
+    from modules.collector import GitHubCollector
     collector = GitHubCollector(config)
     
     # Ensure schema is initialized
-    collector.initialize_bigquery()
+    _ensure_bq(collector)
     
     logger.info(f"Resuming collection with ID: {collection_id}")
     
@@ -242,7 +328,7 @@ def resume_command(config: Config, collection_id: str, repos: Optional[str] = No
     
     # Try to parse collection_id as datetime for date range
     try:
-        collection_dt = datetime.fromisoformat(collection_id.replace('Z', '+00:00'))
+        collection_dt = _parse_iso(collection_id)
         # Use a reasonable time window around the collection time
         since = collection_dt - timedelta(hours=24)
         until = collection_dt + timedelta(hours=24)
@@ -264,12 +350,9 @@ def resume_command(config: Config, collection_id: str, repos: Optional[str] = No
     logger.info(f"Summary: {counts}")
 
 
-def main():
-    """Main entry point"""
-    parser = argparse.ArgumentParser(
-        description='GitHub Stats Collector - Collect and analyze GitHub repository statistics',
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog='''
+def _build_epilog() -> str:
+    """Build the examples/environment help text shown under --help"""
+    return '''
 Examples:
   # Initialize BigQuery schema
   python main.py init
@@ -312,7 +395,19 @@ Environment Variables:
   PERSIST_TO_GCS        Persist to GCS before BigQuery (default: true)
   GITHUB_ORG            GitHub organization name (default: askscio)
   MAX_WORKERS           Number of parallel workers (default: 10)
-        '''
+'''
+
+
+def main():
+    """Main entry point"""
+    # Only build the (large) epilog when someone will actually read it:
+    # containers and schedulers invoke this entry point non-interactively
+    # and never render help text.
+    wants_help = sys.stdout.isatty() or '-h' in sys.argv or '--help' in sys.argv
+    parser = argparse.ArgumentParser(
+        description='GitHub Stats Collector - Collect and analyze GitHub repository statistics',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=_build_epilog() if wants_help else None
     )
     
     parser.add_argument('-v', '--verbose', action='store_true',
@@ -330,6 +425,9 @@ Environment Variables:
                                 help='Number of days to backfill (default: 180)')
     backfill_parser.add_argument('--repos', type=str,
                                 help='Comma-separated list of repositories to backfill')
+    backfill_parser.add_argument('--use-load-jobs', action='store_true',
+                                help='Publish via bulk load jobs instead of MERGE upserts '
+                                     '(much faster; appends only, for empty/rebuilt tables)')
     
     # Collect command
     collect_parser = subparsers.add_parser('collect',
@@ -358,10 +456,14 @@ Environment Variables:
                                 help='Repository name to load (loads all if not specified)')
     load_gcs_parser.add_argument('--date', type=str,
                                 help='Date filter (YYYY-MM-DD)')
+    load_gcs_parser.add_argument('--gcs-workers', type=int,
+                                help='Number of parallel GCS downloads (default: 4x MAX_WORKERS)')
     
     # GCS summary command
     summary_parser = subparsers.add_parser('gcs-summary',
                                           help='Show summary of data in GCS bucket')
+    summary_parser.add_argument('--no-cache', action='store_true',
+                               help='Bypass the cached summary and re-list the bucket')
     
     # Wipe GCS command
     wipe_parser = subparsers.add_parser('wipe-gcs',
@@ -404,7 +506,7 @@ Environment Variables:
             initialize_command(config)
         
         elif args.command == 'backfill':
-            backfill_command(config, args.days, args.repos)
+            backfill_command(config, args.days, args.repos, args.use_load_jobs)
         
         elif args.command == 'collect':
             collect_command(config, args.since, args.until, args.hours, args.repos)
@@ -413,10 +515,10 @@ Environment Variables:
             scheduled_command(config, args.interval, args.repos)
         
         elif args.command == 'load-gcs':
-            load_gcs_command(config, args.repo, args.date)
+            load_gcs_command(config, args.repo, args.date, args.gcs_workers)
         
         elif args.command == 'gcs-summary':
-            gcs_summary_command(config)
+            gcs_summary_command(config, args.no_cache)
         
         elif args.command == 'wipe-gcs':
             wipe_gcs_command(config, args.repo, args.confirm)
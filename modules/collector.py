@@ -2,29 +2,84 @@
 Collector Job Module
 Ongoing collection job that curates GitHub data and publishes to BigQuery
 """
+import io
 import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import attrgetter
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone, timedelta
+import orjson
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
+from google.api_core import exceptions as api_exceptions
+from google.api_core import retry as api_retry
 
 from config import Config
 from utils.github_client import GitHubClient
+from utils.etag_cache import ETagCache
 from utils.storage import GCSStorage
-from modules.fetcher import GitHubFetcher, PullRequestData
+from modules.fetcher import GitHubFetcher, PullRequestData, _normalize_timestamp
 from modules.schema import BigQuerySchema
 
 logger = logging.getLogger(__name__)
 
 
+# Streaming-insert errors worth retrying (transient server-side issues)
+_TRANSIENT_BQ_ERRORS = (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.InternalServerError,
+    ConnectionError,
+)
+
+# Retry policy for BigQuery jobs (loads and MERGE queries): transient
+# server errors shouldn't cost a whole collection cycle
+_BQ_JOB_RETRY = api_retry.Retry(
+    predicate=api_retry.if_exception_type(
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.InternalServerError,
+        api_exceptions.TooManyRequests,
+    ),
+    deadline=300,
+)
+
+
+# PullRequestData fields that map straight into the pull_requests row;
+# one C-level attrgetter fetch replaces 22 interpreted attribute lookups
+# per PR (datetime fields are handled separately)
+_PR_SCALAR_FIELDS = (
+    "pr_number", "repository", "organization", "title", "state",
+    "author", "author_type", "url", "additions", "deletions",
+    "changed_files", "labels", "size_label", "commit_count",
+    "review_count", "review_comment_count", "issue_comment_count",
+    "is_draft", "is_merged", "merge_commit_sha", "base_ref", "head_ref",
+)
+_GET_PR_SCALARS = attrgetter(*_PR_SCALAR_FIELDS)
+
+
+# Upserts at or below this many rows MERGE straight from an inline
+# query parameter instead of staging a temp table (one query job versus
+# a load job, a query job and a delete RPC)
+_INLINE_MERGE_MAX_ROWS = 1000
+
+
+def _utc_now_iso() -> str:
+    """Current UTC time as an ISO string with a fixed-width microseconds field"""
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+
 class GitHubCollector:
     """Collects GitHub data and publishes to BigQuery (optionally via GCS)"""
     
     def __init__(self, config: Config):
         self.config = config
+        etag_cache = ETagCache(config.etag_cache_path) if config.etag_cache_path else None
         self.github_client = GitHubClient(
-            config.github_token,
-            config.max_requests_per_hour
+            config.github_tokens or config.github_token,
+            config.max_requests_per_hour,
+            etag_cache=etag_cache
         )
         self.fetcher = GitHubFetcher(self.github_client, config.max_workers)
         self.bq_schema = BigQuerySchema(
@@ -42,6 +97,55 @@ class GitHubCollector:
             )
         else:
             self.storage = None
+        
+        # bigquery.Table objects fetched once per process; every upsert
+        # needs the live schema and re-fetching it is a metadata RPC
+        self._table_cache: Dict[str, bigquery.Table] = {}
+        # MERGE statements are identical per table modulo the temp table
+        # name, so build each once and substitute the temp reference
+        self._merge_query_cache: Dict[str, str] = {}
+    
+    def _get_table(self, table_id: str) -> bigquery.Table:
+        """Get the bigquery.Table for a table id, cached per process"""
+        table = self._table_cache.get(table_id)
+        if table is None:
+            table = self.bq_client.get_table(self.bq_schema.get_table_reference(table_id))
+            self._table_cache[table_id] = table
+        return table
+    
+    def _get_pr_watermarks(self, repo_filter: Optional[List[str]] = None) -> Dict[str, Dict[int, datetime]]:
+        """
+        Read per-PR updated_at watermarks from BigQuery
+        
+        updated_at is GitHub's change fingerprint, so PRs whose stored
+        value matches the listing can skip all four sub-resource
+        fetches. Failures degrade to an empty map (everything is
+        re-fetched), never to a failed collection.
+        """
+        table_ref = self.bq_schema.get_table_reference("pull_requests")
+        query = (f"SELECT repository, pr_number, MAX(updated_at) AS updated_at "
+                 f"FROM `{table_ref}` ")
+        job_config = None
+        if repo_filter:
+            query += "WHERE repository IN UNNEST(@repos) "
+            job_config = bigquery.QueryJobConfig(
+                query_parameters=[
+                    bigquery.ArrayQueryParameter("repos", "STRING", repo_filter)
+                ]
+            )
+        query += "GROUP BY repository, pr_number"
+        
+        watermarks: Dict[str, Dict[int, datetime]] = {}
+        try:
+            for row in self.bq_client.query(query, job_config=job_config).result():
+                watermarks.setdefault(row.repository, {})[row.pr_number] = row.updated_at
+        except Exception as e:
+            logger.warning(f"Could not load PR watermarks, re-fetching everything: {e}")
+            return {}
+        
+        total = sum(len(per_repo) for per_repo in watermarks.values())
+        logger.info(f"Loaded {total} PR watermarks for {len(watermarks)} repositories")
+        return watermarks
     
     def initialize_bigquery(self):
         """Initialize BigQuery dataset and tables"""
@@ -49,70 +153,67 @@ class GitHubCollector:
         tables = self.bq_schema.create_all_tables()
         logger.info(f"BigQuery initialization complete: {len(tables)} tables ready")
     
-    def _prepare_pr_rows(self, pr_data_list: List[PullRequestData]) -> List[Dict[str, Any]]:
-        """Prepare PR data for BigQuery insertion"""
-        rows = []
-        ingestion_timestamp = datetime.now(timezone.utc)
+    def _prepare_all_rows(self, pr_data_list: List[PullRequestData],
+                          batch_id: Optional[str] = None,
+                          ingestion_ts: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Prepare rows for every BigQuery table in a single pass
         
-        for pr in pr_data_list:
-            row = {
-                "pr_number": pr.pr_number,
-                "repository": pr.repository,
-                "organization": pr.organization,
-                "title": pr.title,
-                "state": pr.state,
-                "author": pr.author,
-                "author_type": pr.author_type,
-                "created_at": pr.created_at.isoformat(),
-                "updated_at": pr.updated_at.isoformat(),
-                "closed_at": pr.closed_at.isoformat() if pr.closed_at else None,
-                "merged_at": pr.merged_at.isoformat() if pr.merged_at else None,
-                "url": pr.url,
-                "additions": pr.additions,
-                "deletions": pr.deletions,
-                "changed_files": pr.changed_files,
-                "labels": pr.labels,
-                "size_label": pr.size_label,
-                "commit_count": pr.commit_count,
-                "review_count": pr.review_count,
-                "review_comment_count": pr.review_comment_count,
-                "issue_comment_count": pr.issue_comment_count,
-                "is_draft": pr.is_draft,
-                "is_merged": pr.is_merged,
-                "merge_commit_sha": pr.merge_commit_sha,
-                "base_ref": pr.base_ref,
-                "head_ref": pr.head_ref,
-                "ingestion_timestamp": ingestion_timestamp.isoformat(),
-            }
-            rows.append(row)
+        One traversal of the PR list builds the pull_requests, commits,
+        reviews, review_comments and issue_comments rows together, so the
+        list is walked once instead of five times and the ingestion
+        timestamp is identical across all tables (callers batching
+        multiple flushes pass one ingestion_ts so a whole run shares a
+        single timestamp). Every row carries the
+        same batch_id, so downstream SQL can select an ingest batch with
+        a point lookup instead of an ingestion_timestamp range scan.
+        """
+        if batch_id is None:
+            batch_id = uuid.uuid4().hex
+        if ingestion_ts is None:
+            ingestion_ts = _utc_now_iso()
+        pr_rows: List[Dict[str, Any]] = []
+        commit_rows: List[Dict[str, Any]] = []
+        review_rows: List[Dict[str, Any]] = []
+        review_comment_rows: List[Dict[str, Any]] = []
+        issue_comment_rows: List[Dict[str, Any]] = []
         
-        return rows
-    
-    def _prepare_commit_rows(self, pr_data_list: List[PullRequestData]) -> List[Dict[str, Any]]:
-        """Prepare commit data for BigQuery insertion"""
-        rows = []
-        ingestion_timestamp = datetime.now(timezone.utc)
+        norm_ts = _normalize_timestamp
+        ingestion_timestamp = ingestion_ts
         
         for pr in pr_data_list:
+            pr_number = pr.pr_number
+            repository = pr.repository
+            organization = pr.organization
+            
+            row = dict(zip(_PR_SCALAR_FIELDS, _GET_PR_SCALARS(pr)))
+            row["created_at"] = pr.created_at.isoformat()
+            row["updated_at"] = pr.updated_at.isoformat()
+            row["closed_at"] = pr.closed_at.isoformat() if pr.closed_at else None
+            row["merged_at"] = pr.merged_at.isoformat() if pr.merged_at else None
+            row["ingestion_timestamp"] = ingestion_timestamp
+            row["batch_id"] = batch_id
+            pr_rows.append(row)
+            
             for commit in pr.commits:
                 commit_info = commit.get('commit', {})
                 author_info = commit_info.get('author', {})
                 committer_info = commit_info.get('committer', {})
                 
                 # Parse commit date
-                commit_date = commit_info.get('committer', {}).get('date')
+                commit_date = committer_info.get('date')
                 if commit_date:
-                    commit_date = datetime.fromisoformat(commit_date.replace('Z', '+00:00')).isoformat()
+                    commit_date = norm_ts(commit_date)
                 
                 author_date = author_info.get('date')
                 if author_date:
-                    author_date = datetime.fromisoformat(author_date.replace('Z', '+00:00')).isoformat()
+                    author_date = norm_ts(author_date)
                 
-                row = {
+                commit_rows.append({
                     "sha": commit.get('sha', ''),
-                    "pr_number": pr.pr_number,
-                    "repository": pr.repository,
-                    "organization": pr.organization,
+                    "pr_number": pr_number,
+                    "repository": repository,
+                    "organization": organization,
                     "author": author_info.get('name'),
                     "author_email": author_info.get('email'),
                     "committer": committer_info.get('name'),
@@ -121,29 +222,21 @@ class GitHubCollector:
                     "commit_date": commit_date,
                     "author_date": author_date,
                     "url": commit.get('html_url', ''),
-                    "ingestion_timestamp": ingestion_timestamp.isoformat(),
-                }
-                rows.append(row)
-        
-        return rows
-    
-    def _prepare_review_rows(self, pr_data_list: List[PullRequestData]) -> List[Dict[str, Any]]:
-        """Prepare review data for BigQuery insertion"""
-        rows = []
-        ingestion_timestamp = datetime.now(timezone.utc)
-        
-        for pr in pr_data_list:
+                    "ingestion_timestamp": ingestion_timestamp,
+                    "batch_id": batch_id,
+                })
+            
             for review in pr.reviews:
                 user = review.get('user', {})
                 submitted_at = review.get('submitted_at')
                 if submitted_at:
-                    submitted_at = datetime.fromisoformat(submitted_at.replace('Z', '+00:00')).isoformat()
+                    submitted_at = norm_ts(submitted_at)
                 
-                row = {
+                review_rows.append({
                     "review_id": review.get('id', 0),
-                    "pr_number": pr.pr_number,
-                    "repository": pr.repository,
-                    "organization": pr.organization,
+                    "pr_number": pr_number,
+                    "repository": repository,
+                    "organization": organization,
                     "reviewer": user.get('login', 'unknown'),
                     "reviewer_type": user.get('type', 'User'),
                     "state": review.get('state', 'unknown'),
@@ -151,70 +244,54 @@ class GitHubCollector:
                     "submitted_at": submitted_at,
                     "commit_id": review.get('commit_id'),
                     "url": review.get('html_url', ''),
-                    "ingestion_timestamp": ingestion_timestamp.isoformat(),
-                }
-                rows.append(row)
-        
-        return rows
-    
-    def _prepare_review_comment_rows(self, pr_data_list: List[PullRequestData]) -> List[Dict[str, Any]]:
-        """Prepare review comment data for BigQuery insertion"""
-        rows = []
-        ingestion_timestamp = datetime.now(timezone.utc)
-        
-        for pr in pr_data_list:
+                    "ingestion_timestamp": ingestion_timestamp,
+                    "batch_id": batch_id,
+                })
+            
             for comment in pr.review_comments:
                 user = comment.get('user', {})
-                created_at = datetime.fromisoformat(comment['created_at'].replace('Z', '+00:00')).isoformat()
-                updated_at = datetime.fromisoformat(comment['updated_at'].replace('Z', '+00:00')).isoformat()
-                
-                row = {
+                review_comment_rows.append({
                     "comment_id": comment.get('id', 0),
-                    "pr_number": pr.pr_number,
-                    "repository": pr.repository,
-                    "organization": pr.organization,
+                    "pr_number": pr_number,
+                    "repository": repository,
+                    "organization": organization,
                     "author": user.get('login', 'unknown'),
                     "author_type": user.get('type', 'User'),
                     "body": comment.get('body'),
-                    "created_at": created_at,
-                    "updated_at": updated_at,
+                    "created_at": norm_ts(comment['created_at']),
+                    "updated_at": norm_ts(comment['updated_at']),
                     "path": comment.get('path'),
                     "position": comment.get('position'),
                     "commit_id": comment.get('commit_id'),
                     "url": comment.get('html_url', ''),
-                    "ingestion_timestamp": ingestion_timestamp.isoformat(),
-                }
-                rows.append(row)
-        
-        return rows
-    
-    def _prepare_issue_comment_rows(self, pr_data_list: List[PullRequestData]) -> List[Dict[str, Any]]:
-        """Prepare issue comment data for BigQuery insertion"""
-        rows = []
-        ingestion_timestamp = datetime.now(timezone.utc)
-        
-        for pr in pr_data_list:
+                    "ingestion_timestamp": ingestion_timestamp,
+                    "batch_id": batch_id,
+                })
+            
             for comment in pr.issue_comments:
                 user = comment.get('user', {})
-                created_at = datetime.fromisoformat(comment['created_at'].replace('Z', '+00:00')).isoformat()
-                updated_at = datetime.fromisoformat(comment['updated_at'].replace('Z', '+00:00')).isoformat()
-                
-                row = {
+                issue_comment_rows.append({
                     "comment_id": comment.get('id', 0),
-                    "pr_number": pr.pr_number,
-                    "repository": pr.repository,
-                    "organization": pr.organization,
+                    "pr_number": pr_number,
+                    "repository": repository,
+                    "organization": organization,
                     "author": user.get('login', 'unknown'),
                     "author_type": user.get('type', 'User'),
                     "body": comment.get('body'),
-                    "created_at": created_at,
-                    "updated_at": updated_at,
+                    "created_at": norm_ts(comment['created_at']),
+                    "updated_at": norm_ts(comment['updated_at']),
                     "url": comment.get('html_url', ''),
-                    "ingestion_timestamp": ingestion_timestamp.isoformat(),
-                }
-                rows.append(row)
+                    "ingestion_timestamp": ingestion_timestamp,
+                    "batch_id": batch_id,
+                })
         
-        return rows
+        return {
+            "pull_requests": pr_rows,
+            "commits": commit_rows,
+            "reviews": review_rows,
+            "review_comments": review_comment_rows,
+            "issue_comments": issue_comment_rows,
+        }
     
     def _get_merge_key(self, table_id: str) -> List[str]:
         """Get the unique key fields for a table"""
@@ -227,6 +304,97 @@ class GitHubCollector:
         }
         return merge_keys.get(table_id, [])
     
+    def _get_row_ids(self, table_id: str, rows: List[Dict[str, Any]]) -> Optional[List[str]]:
+        """
+        Build deterministic insertIds from a table's unique key fields
+        
+        The streaming API dedupes on insertId within a short window, so
+        stable IDs make retried (or re-sent) chunks idempotent.
+        """
+        merge_keys = self._get_merge_key(table_id)
+        if not merge_keys:
+            return None
+        return [":".join(str(row[key]) for key in merge_keys) for row in rows]
+    
+    # Per-table gate on the MERGE's WHEN MATCHED clause: a condition
+    # narrows the update to rows that actually changed; None drops the
+    # clause entirely (commits are immutable, so their MERGE is
+    # insert-only). Reviews keep their original submitted_at forever
+    # while state and body still move (dismissals, edits), so they
+    # gate on those instead of a timestamp.
+    _MERGE_MATCHED_CONDITIONS = {
+        "pull_requests": "target.updated_at < source.updated_at",
+        "commits": None,
+        "reviews": ("target.state IS DISTINCT FROM source.state"
+                    " OR target.body IS DISTINCT FROM source.body"),
+        "review_comments": "target.updated_at < source.updated_at",
+        "issue_comments": "target.updated_at < source.updated_at",
+    }
+    
+    def _get_merge_query_template(self, table_id: str) -> str:
+        """Get the MERGE statement for a table (cached; {source} placeholder)"""
+        template = self._merge_query_cache.get(table_id)
+        if template is None:
+            table_ref = self.bq_schema.get_table_reference(table_id)
+            merge_keys = self._get_merge_key(table_id)
+            columns = [field.name for field in self._get_table(table_id).schema]
+            
+            merge_condition = " AND ".join([f"target.{key} = source.{key}" for key in merge_keys])
+            insert_cols = ", ".join(columns)
+            insert_vals = ", ".join([f"source.{col}" for col in columns])
+            
+            # Skip no-op updates: only rewrite a matched row when its
+            # change condition says it actually moved
+            condition = self._MERGE_MATCHED_CONDITIONS.get(table_id)
+            matched_clause = ""
+            if condition is not None:
+                update_set = ", ".join([f"{col} = source.{col}" for col in columns if col not in merge_keys])
+                matched_clause = (f"WHEN MATCHED AND ({condition}) THEN\n"
+                                  f"                UPDATE SET {update_set}\n            ")
+            
+            template = f"""
+            MERGE `{table_ref}` AS target
+            USING {{source}} AS source
+            ON {merge_condition}
+            {matched_clause}WHEN NOT MATCHED THEN
+                INSERT ({insert_cols})
+                VALUES ({insert_vals})
+            """
+            self._merge_query_cache[table_id] = template
+        return template
+    
+    def _row_struct_param(self, schema, row: Dict[str, Any]) -> bigquery.StructQueryParameter:
+        """Build a positional STRUCT query parameter for one row"""
+        params = []
+        for field in schema:
+            value = row.get(field.name)
+            if field.mode == 'REPEATED':
+                params.append(bigquery.ArrayQueryParameter(field.name, field.field_type, value or []))
+            else:
+                params.append(bigquery.ScalarQueryParameter(field.name, field.field_type, value))
+        return bigquery.StructQueryParameter.positional(*params)
+
+    def _merge_inline(self, table_id: str, rows: List[Dict[str, Any]]) -> int:
+        """MERGE a small batch from an inline array parameter (no temp table)"""
+        schema = self._get_table(table_id).schema
+        merge_query = self._get_merge_query_template(table_id).format(
+            source="UNNEST(@rows)"
+        )
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ArrayQueryParameter(
+                    "rows", "STRUCT",
+                    [self._row_struct_param(schema, row) for row in rows]
+                )
+            ]
+        )
+        query_job = self.bq_client.query(merge_query, job_config=job_config)
+        query_job.result(retry=_BQ_JOB_RETRY)
+
+        rows_affected = query_job.num_dml_affected_rows or len(rows)
+        logger.info(f"Successfully upserted {rows_affected} rows into {table_id} (inline)")
+        return rows_affected
+
     def _upsert_rows(self, table_id: str, rows: List[Dict[str, Any]]) -> int:
         """Upsert rows into BigQuery table using MERGE to avoid duplicates"""
         if not rows:
@@ -242,83 +410,191 @@ class GitHubCollector:
             logger.warning(f"No merge keys defined for {table_id}, using insert")
             return self._insert_rows(table_id, rows)
         
+        # Deduplicate on the merge key client-side (last occurrence
+        # wins): overlapping collection windows re-fetch the same PRs,
+        # and duplicate rows just inflate the temp table and MERGE scan
+        deduped = {tuple(row[key] for key in merge_keys): row for row in rows}
+        if len(deduped) < len(rows):
+            logger.info(f"Dropped {len(rows) - len(deduped)} duplicate rows for {table_id}")
+            rows = list(deduped.values())
+        
+        # Small batches skip the temp table entirely: the rows travel as
+        # an inline array parameter and the MERGE reads them via UNNEST,
+        # replacing a load job, a query job and a delete RPC with one
+        # query job. Incremental runs usually land here.
+        if len(rows) <= _INLINE_MERGE_MAX_ROWS:
+            try:
+                return self._merge_inline(table_id, rows)
+            except Exception as e:
+                # Inline parameters have limits the temp table doesn't —
+                # e.g. large commit messages or comment bodies can push
+                # the query request over its size cap — so fall through
+                # to the staged merge instead of dropping the batch
+                logger.warning(f"Inline merge failed for {table_id}, "
+                               f"falling back to temp-table merge: {e}")
+
         # Create a temporary table with the new data
         temp_table_id = f"{table_id}_temp_{int(datetime.now(timezone.utc).timestamp())}"
         temp_table_ref = f"{self.config.bigquery_project_id}.{self.config.bigquery_dataset_id}.{temp_table_id}"
         
         try:
-            # Create temporary table with same schema
-            source_table = self.bq_client.get_table(table_ref)
-            temp_table = bigquery.Table(temp_table_ref, schema=source_table.schema)
-            temp_table = self.bq_client.create_table(temp_table)
-            
-            # Insert data into temporary table
-            errors = self.bq_client.insert_rows_json(temp_table_ref, rows)
-            if errors:
-                logger.error(f"Errors inserting into temp table: {errors}")
-                self.bq_client.delete_table(temp_table_ref)
-                return 0
-            
-            # Build MERGE query
-            merge_condition = " AND ".join([f"target.{key} = source.{key}" for key in merge_keys])
-            
-            # Get all column names from schema
-            columns = [field.name for field in source_table.schema]
-            update_set = ", ".join([f"{col} = source.{col}" for col in columns if col not in merge_keys])
-            insert_cols = ", ".join(columns)
-            insert_vals = ", ".join([f"source.{col}" for col in columns])
+            # Load data straight into the temporary table via a load job
+            # with orjson-encoded NDJSON: the job creates the table with
+            # the source schema (no separate create_table round-trip),
+            # costs nothing in streaming-insert billing, and the rows
+            # are immediately visible to the MERGE (streamed rows can
+            # sit in the streaming buffer).
+            source_table = self._get_table(table_id)
+            buf = io.BytesIO()
+            for row in rows:
+                buf.write(orjson.dumps(row))
+                buf.write(b"\n")
+            buf.seek(0)
+            load_job = self.bq_client.load_table_from_file(
+                buf,
+                temp_table_ref,
+                job_config=bigquery.LoadJobConfig(
+                    source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+                    schema=source_table.schema,
+                    write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+                    # Tables created before newer row fields (e.g.
+                    # batch_id) lack those columns until the migration
+                    # in deployment/README.md runs; drop unknown fields
+                    # instead of failing the whole load
+                    ignore_unknown_values=True,
+                )
+            )
+            load_job.result(retry=_BQ_JOB_RETRY)
             
-            merge_query = f"""
-            MERGE `{table_ref}` AS target
-            USING `{temp_table_ref}` AS source
-            ON {merge_condition}
-            WHEN MATCHED THEN
-                UPDATE SET {update_set}
-            WHEN NOT MATCHED THEN
-                INSERT ({insert_cols})
-                VALUES ({insert_vals})
-            """
+            merge_query = self._get_merge_query_template(table_id).format(
+                source=f"`{temp_table_ref}`"
+            )
             
             # Execute MERGE
             query_job = self.bq_client.query(merge_query)
-            query_job.result()  # Wait for completion
+            query_job.result(retry=_BQ_JOB_RETRY)  # Wait for completion
             
             # Get number of rows affected
             rows_affected = query_job.num_dml_affected_rows or len(rows)
             
             # Clean up temporary table
-            self.bq_client.delete_table(temp_table_ref)
+            self.bq_client.delete_table(temp_table_ref, not_found_ok=True)
             
             logger.info(f"Successfully upserted {rows_affected} rows into {table_id}")
             return rows_affected
             
         except Exception as e:
             logger.error(f"Error during upsert: {e}")
-            # Try to clean up temp table
-            try:
-                self.bq_client.delete_table(temp_table_ref)
-            except:
-                pass
+            self.bq_client.delete_table(temp_table_ref, not_found_ok=True)
             return 0
     
-    def _insert_rows(self, table_id: str, rows: List[Dict[str, Any]]) -> int:
-        """Insert rows into BigQuery table (direct insert, may create duplicates)"""
+    def _insert_rows(self, table_id: str, rows: List[Dict[str, Any]],
+                     row_ids: Optional[List[str]] = None) -> int:
+        """
+        Insert rows into BigQuery table (direct insert, may create duplicates)
+        
+        Rows are split into chunks (BigQuery recommends 500 rows per
+        streaming request and caps requests at 50,000) and the chunks are
+        sent in parallel. Pass row_ids (one per row) to let insertAll
+        deduplicate on retries.
+        """
         if not rows:
             logger.info(f"No rows to insert into {table_id}")
             return 0
         
+        if row_ids is None:
+            row_ids = self._get_row_ids(table_id, rows)
+        
         table_ref = self.bq_schema.get_table_reference(table_id)
-        logger.info(f"Inserting {len(rows)} rows into {table_ref}")
+        chunk_size = self.config.bq_insert_chunk_size
+        logger.info(f"Inserting {len(rows)} rows into {table_ref} "
+                    f"(chunks of {chunk_size})")
+        
+        def insert_chunk(start: int) -> List[Dict[str, Any]]:
+            chunk = rows[start:start + chunk_size]
+            ids = row_ids[start:start + chunk_size] if row_ids else None
+            # Retry transient failures; the deterministic insertIds make
+            # a re-sent chunk idempotent on the BigQuery side
+            delay = 1.0
+            errors: List[Dict[str, Any]] = []
+            for attempt in range(3):
+                try:
+                    # ignore_unknown_values keeps inserts working on
+                    # tables that predate newer row fields (batch_id)
+                    errors = self.bq_client.insert_rows_json(
+                        table_ref, chunk, row_ids=ids, ignore_unknown_values=True)
+                except _TRANSIENT_BQ_ERRORS as e:
+                    if attempt == 2:
+                        raise
+                    logger.warning(f"Transient insert error on {table_id} "
+                                   f"(attempt {attempt + 1}): {e}")
+                else:
+                    if not errors:
+                        return []
+                    # BigQuery reports failures per row; re-submit only
+                    # the failing rows instead of dropping the chunk
+                    failed = [e['index'] for e in errors if 'index' in e]
+                    if attempt == 2 or not failed:
+                        return errors
+                    logger.warning(f"{len(failed)} rows failed in {table_id} "
+                                   f"(attempt {attempt + 1}), re-submitting")
+                    chunk = [chunk[i] for i in failed]
+                    if ids:
+                        ids = [ids[i] for i in failed]
+                time.sleep(delay)
+                delay *= 2
+            return errors
         
-        errors = self.bq_client.insert_rows_json(table_ref, rows)
+        offsets = range(0, len(rows), chunk_size)
+        errors = []
+        if len(rows) <= chunk_size:
+            errors = insert_chunk(0)
+        else:
+            with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+                for chunk_errors in executor.map(insert_chunk, offsets):
+                    if chunk_errors:
+                        errors.extend(chunk_errors)
         
         if errors:
             logger.error(f"Errors inserting into {table_id}: {errors}")
-            return 0
+            return len(rows) - len(errors)
         
         logger.info(f"Successfully inserted {len(rows)} rows into {table_id}")
         return len(rows)
     
+    def _load_rows(self, table_id: str, rows: List[Dict[str, Any]]) -> int:
+        """
+        Load rows into BigQuery table via a load job (append only)
+        
+        Load jobs are free and much faster than streaming inserts for
+        bulk volumes, at the cost of a per-table daily job quota — use
+        this for backfills, keep _insert_rows/_upsert_rows for the small
+        scheduled runs.
+        """
+        if not rows:
+            logger.info(f"No rows to load into {table_id}")
+            return 0
+        
+        table_ref = self.bq_schema.get_table_reference(table_id)
+        logger.info(f"Loading {len(rows)} rows into {table_ref} via load job")
+        
+        # Serialize to newline-delimited JSON in memory
+        buf = io.BytesIO()
+        for row in rows:
+            buf.write(orjson.dumps(row))
+            buf.write(b"\n")
+        buf.seek(0)
+        
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        )
+        job = self.bq_client.load_table_from_file(buf, table_ref, job_config=job_config)
+        job.result()  # Wait for completion
+        
+        logger.info(f"Successfully loaded {len(rows)} rows into {table_id}")
+        return len(rows)
+    
     def persist_to_gcs(self, pr_data: Dict[str, List[PullRequestData]], 
                       collection_id: Optional[str] = None) -> Dict[str, List[str]]:
         """
@@ -341,6 +617,8 @@ class GitHubCollector:
         
         blob_paths = {}
         timestamp = collection_id
+        batch_id = uuid.uuid4().hex
+        ingestion_ts = _utc_now_iso()
         
         for repo, pr_list in pr_data.items():
             if not pr_list:
@@ -348,168 +626,272 @@ class GitHubCollector:
             
             logger.info(f"Persisting {len(pr_list)} PRs for {repo}")
             
-            # Convert PR data to dictionaries
-            pr_dicts = [pr.to_dict() for pr in pr_list]
-            
-            # Write PR data
-            pr_paths = self.storage.write_data_chunks(
-                self.config.github_org,
-                repo,
-                "pull_requests",
-                pr_dicts,
-                chunk_size=self.config.gcs_chunk_size,
-                timestamp=timestamp
-            )
-            
-            # Prepare and write commits
-            commit_rows = self._prepare_commit_rows(pr_list)
-            commit_paths = self.storage.write_data_chunks(
-                self.config.github_org,
-                repo,
-                "commits",
-                commit_rows,
-                chunk_size=self.config.gcs_chunk_size,
-                timestamp=timestamp
-            )
-            
-            # Prepare and write reviews
-            review_rows = self._prepare_review_rows(pr_list)
-            review_paths = self.storage.write_data_chunks(
-                self.config.github_org,
-                repo,
-                "reviews",
-                review_rows,
-                chunk_size=self.config.gcs_chunk_size,
-                timestamp=timestamp
-            )
-            
-            # Prepare and write review comments
-            review_comment_rows = self._prepare_review_comment_rows(pr_list)
-            review_comment_paths = self.storage.write_data_chunks(
-                self.config.github_org,
-                repo,
-                "review_comments",
-                review_comment_rows,
-                chunk_size=self.config.gcs_chunk_size,
-                timestamp=timestamp
-            )
+            # PR dicts are built lazily; write_data_chunks drains the
+            # generator one chunk at a time
+            pr_dicts = (pr.to_dict() for pr in pr_list)
             
-            # Prepare and write issue comments
-            issue_comment_rows = self._prepare_issue_comment_rows(pr_list)
-            issue_comment_paths = self.storage.write_data_chunks(
-                self.config.github_org,
-                repo,
-                "issue_comments",
-                issue_comment_rows,
-                chunk_size=self.config.gcs_chunk_size,
-                timestamp=timestamp
-            )
+            # Prepare the derived tables (one pass over the PRs), then
+            # write all five data types concurrently — each write is an
+            # independent series of GCS uploads
+            rows_by_table = self._prepare_all_rows(pr_list, batch_id=batch_id,
+                                                   ingestion_ts=ingestion_ts)
+            rows_by_table["pull_requests"] = pr_dicts
             
-            blob_paths[repo] = {
-                "pull_requests": pr_paths,
-                "commits": commit_paths,
-                "reviews": review_paths,
-                "review_comments": review_comment_paths,
-                "issue_comments": issue_comment_paths
-            }
+            with ThreadPoolExecutor(max_workers=len(rows_by_table)) as executor:
+                futures = {
+                    data_type: executor.submit(
+                        self.storage.write_data_chunks,
+                        self.config.github_org,
+                        repo,
+                        data_type,
+                        rows,
+                        chunk_size=self.config.gcs_chunk_size,
+                        timestamp=timestamp
+                    )
+                    for data_type, rows in rows_by_table.items()
+                }
+                blob_paths[repo] = {data_type: future.result()
+                                    for data_type, future in futures.items()}
         
         logger.info(f"Data persisted to GCS for {len(blob_paths)} repositories")
         return blob_paths
     
-    def publish_to_bigquery(self, pr_data: Dict[str, List[PullRequestData]]) -> Dict[str, int]:
+    def _persist_and_publish(self, pr_data: Dict[str, List[PullRequestData]],
+                             collection_id: str,
+                             use_load_jobs: bool = False):
+        """
+        Persist to GCS and publish to BigQuery from one row preparation
+
+        The separate persist_to_gcs + publish_to_bigquery path runs
+        _prepare_all_rows twice over the same PRs. Here each repo's rows
+        are prepared once and the same dicts fan out to both the GCS
+        chunk writes and the BigQuery publish buffers. Publishes are
+        flushed in the same bounded batches as publish_to_bigquery.
+
+        Returns:
+            Tuple of (blob paths per repository, row counts per table)
+        """
+        if not self.storage:
+            raise ValueError("GCS storage not configured. Set persist_to_gcs=True")
+
+        logger.info("Persisting data to GCS and publishing to BigQuery")
+
+        publish = self._load_rows if use_load_jobs else self._upsert_rows
+        timestamp = collection_id
+        batch_id = uuid.uuid4().hex
+        ingestion_ts = _utc_now_iso()
+        flush_threshold = self.config.batch_size * 10
+
+        blob_paths = {}
+        counts: Dict[str, int] = {}
+        buffers: Dict[str, List[Dict[str, Any]]] = {
+            table_id: [] for table_id in self._MERGE_MATCHED_CONDITIONS
+        }
+        buffered_prs = 0
+
+        def flush():
+            nonlocal buffered_prs
+            with ThreadPoolExecutor(max_workers=len(buffers)) as executor:
+                futures = {
+                    table_id: executor.submit(publish, table_id, list(rows))
+                    for table_id, rows in buffers.items() if rows
+                }
+                for table_id, future in futures.items():
+                    counts[table_id] = counts.get(table_id, 0) + future.result()
+            for rows in buffers.values():
+                rows.clear()
+            buffered_prs = 0
+
+        for repo, pr_list in pr_data.items():
+            if not pr_list:
+                continue
+
+            logger.info(f"Persisting {len(pr_list)} PRs for {repo}")
+
+            # One pass over the PRs serves both destinations; GCS gets
+            # the full to_dict() payload for pull_requests (nested
+            # sub-resources included) while BigQuery gets the flat row
+            rows_by_table = self._prepare_all_rows(pr_list, batch_id=batch_id,
+                                                   ingestion_ts=ingestion_ts)
+            gcs_payloads = dict(rows_by_table)
+            gcs_payloads["pull_requests"] = (pr.to_dict() for pr in pr_list)
+
+            with ThreadPoolExecutor(max_workers=len(gcs_payloads)) as executor:
+                futures = {
+                    data_type: executor.submit(
+                        self.storage.write_data_chunks,
+                        self.config.github_org,
+                        repo,
+                        data_type,
+                        rows,
+                        chunk_size=self.config.gcs_chunk_size,
+                        timestamp=timestamp
+                    )
+                    for data_type, rows in gcs_payloads.items()
+                }
+                blob_paths[repo] = {data_type: future.result()
+                                    for data_type, future in futures.items()}
+
+            for table_id, rows in rows_by_table.items():
+                buffers[table_id].extend(rows)
+            buffered_prs += len(pr_list)
+            if buffered_prs >= flush_threshold:
+                flush()
+
+        if buffered_prs:
+            flush()
+
+        logger.info(f"Persisted {len(blob_paths)} repositories and published: {counts}")
+        return blob_paths, counts
+
+    def publish_to_bigquery(self, pr_data: Dict[str, List[PullRequestData]],
+                            use_load_jobs: bool = False) -> Dict[str, int]:
         """
         Publish collected data to BigQuery
         
+        Args:
+            pr_data: Dictionary mapping repository names to lists of PullRequestData
+            use_load_jobs: Append via free bulk load jobs instead of
+                MERGE upserts (for backfills into empty/rebuilt tables)
+        
         Returns:
             Dictionary with counts of inserted rows per table
         """
         logger.info("Publishing data to BigQuery")
         
-        # Flatten all PR data
-        all_prs = []
-        for repo_prs in pr_data.values():
-            all_prs.extend(repo_prs)
+        publish = self._load_rows if use_load_jobs else self._upsert_rows
         
-        if not all_prs:
-            logger.warning("No PR data to publish")
-            return {}
+        # Publish in bounded batches of PRs rather than materializing
+        # the whole org's row lists at once: each PR expands into ~5
+        # tables of row dicts, so on a backfill the unbatched peak
+        # memory is several times the raw payload.
+        flush_threshold = self.config.batch_size * 10
+        counts: Dict[str, int] = {}
+        buffer: List[PullRequestData] = []
+        batch_id = uuid.uuid4().hex
+        ingestion_ts = _utc_now_iso()
         
-        counts = {}
-        
-        # Upsert PRs (avoid duplicates)
-        pr_rows = self._prepare_pr_rows(all_prs)
-        counts['pull_requests'] = self._upsert_rows('pull_requests', pr_rows)
-        
-        # Upsert commits (avoid duplicates)
-        commit_rows = self._prepare_commit_rows(all_prs)
-        counts['commits'] = self._upsert_rows('commits', commit_rows)
-        
-        # Upsert reviews (avoid duplicates)
-        review_rows = self._prepare_review_rows(all_prs)
-        counts['reviews'] = self._upsert_rows('reviews', review_rows)
+        def flush():
+            batch_counts = self._publish_tables(buffer, publish, batch_id=batch_id,
+                                                ingestion_ts=ingestion_ts)
+            for table_id, count in batch_counts.items():
+                counts[table_id] = counts.get(table_id, 0) + count
+            buffer.clear()
         
-        # Upsert review comments (avoid duplicates)
-        review_comment_rows = self._prepare_review_comment_rows(all_prs)
-        counts['review_comments'] = self._upsert_rows('review_comments', review_comment_rows)
+        for repo_prs in pr_data.values():
+            buffer.extend(repo_prs)
+            if len(buffer) >= flush_threshold:
+                flush()
+        if buffer:
+            flush()
         
-        # Upsert issue comments (avoid duplicates)
-        issue_comment_rows = self._prepare_issue_comment_rows(all_prs)
-        counts['issue_comments'] = self._upsert_rows('issue_comments', issue_comment_rows)
+        if not counts:
+            logger.warning("No PR data to publish")
+            return {}
         
         logger.info(f"Publishing complete: {counts}")
         return counts
     
+    def _publish_tables(self, all_prs: List[PullRequestData], publish,
+                        batch_id: Optional[str] = None,
+                        ingestion_ts: Optional[str] = None) -> Dict[str, int]:
+        """
+        Prepare and publish one batch of PRs to all five tables
+        
+        The five publishes are independent BigQuery round-trips, so they
+        run concurrently and the wall clock is the slowest table rather
+        than the sum.
+        """
+        if not all_prs:
+            return {}
+        
+        rows_by_table = self._prepare_all_rows(all_prs, batch_id=batch_id,
+                                               ingestion_ts=ingestion_ts)
+        with ThreadPoolExecutor(max_workers=len(rows_by_table)) as executor:
+            futures = {
+                table_id: executor.submit(publish, table_id, rows)
+                for table_id, rows in rows_by_table.items()
+            }
+            return {table_id: future.result()
+                    for table_id, future in futures.items()}
+    
     def load_from_gcs_and_publish(self, repo: Optional[str] = None,
-                                  date_filter: Optional[str] = None) -> Dict[str, int]:
+                                  date_filter: Optional[str] = None,
+                                  gcs_workers: Optional[int] = None,
+                                  use_load_jobs: bool = False) -> Dict[str, int]:
         """
         Load data from GCS and publish to BigQuery
-        
+
         Args:
             repo: Optional repository name to load (if None, load all)
             date_filter: Optional date filter (YYYY-MM-DD)
-        
+            gcs_workers: Number of parallel blob downloads (default: 4x max_workers)
+            use_load_jobs: Append via free bulk load jobs instead of
+                MERGE upserts (for backfills into empty/rebuilt tables)
+
         Returns:
             Dictionary with counts of inserted rows per table
         """
         if not self.storage:
             raise ValueError("GCS storage not configured")
-        
+
         logger.info(f"Loading data from GCS for org: {self.config.github_org}")
-        
+
+        if gcs_workers is None:
+            gcs_workers = self.config.max_workers * 4
+
         # Determine which repositories to process
         if repo:
             repos_to_process = [repo]
         else:
             repos_to_process = self.storage.list_repositories(self.config.github_org)
-        
+
         logger.info(f"Processing {len(repos_to_process)} repositories")
-        
+
         counts = {}
         data_types = ["pull_requests", "commits", "reviews", "review_comments", "issue_comments"]
-        
-        for data_type in data_types:
-            all_rows = []
-            
-            for repo_name in repos_to_process:
-                # List all data files for this repo and data type
-                blob_paths = self.storage.list_data_files(
+        rows_by_type = {data_type: [] for data_type in data_types}
+
+        # Each (repo, data_type) listing is its own GCS round-trip, so
+        # list every prefix concurrently and submit the downloads as
+        # each listing completes — the read stage overlaps the list
+        # stage instead of waiting for all listings to finish
+        with ThreadPoolExecutor(max_workers=gcs_workers) as executor:
+            list_futures = {
+                executor.submit(
+                    self.storage.list_data_files,
                     self.config.github_org,
                     repo_name,
                     data_type,
                     date_filter
-                )
-                
+                ): (repo_name, data_type)
+                for repo_name in repos_to_process
+                for data_type in data_types
+            }
+
+            read_futures = []
+            for future in as_completed(list_futures):
+                repo_name, data_type = list_futures[future]
+                blob_paths = future.result()
                 logger.info(f"Found {len(blob_paths)} {data_type} files for {repo_name}")
-                
-                # Read and accumulate data
                 for blob_path in blob_paths:
-                    blob_data = self.storage.read_blob(blob_path)
-                    if blob_data and 'data' in blob_data:
-                        all_rows.extend(blob_data['data'])
-            
-            # Upsert into BigQuery (avoid duplicates)
+                    read_futures.append(
+                        (data_type, executor.submit(self.storage.read_blob, blob_path))
+                    )
+
+            for data_type, future in read_futures:
+                blob_data = future.result()
+                if blob_data and 'data' in blob_data:
+                    rows_by_type[data_type].extend(blob_data['data'])
+
+        for data_type, all_rows in rows_by_type.items():
+            # Upsert into BigQuery (avoid duplicates), or bulk-load
+            # when the caller knows appends are safe
             if all_rows:
-                count = self._upsert_rows(data_type, all_rows)
+                if use_load_jobs:
+                    count = self._load_rows(data_type, all_rows)
+                else:
+                    count = self._upsert_rows(data_type, all_rows)
                 counts[data_type] = count
             else:
                 counts[data_type] = 0
@@ -522,7 +904,8 @@ class GitHubCollector:
                            until: Optional[datetime] = None,
                            repo_filter: Optional[List[str]] = None,
                            collection_id: Optional[str] = None,
-                           resume: bool = False) -> Dict[str, int]:
+                           resume: bool = False,
+                           use_load_jobs: bool = False) -> Dict[str, int]:
         """
         Collect data from GitHub and publish to BigQuery (optionally via GCS)
         
@@ -532,6 +915,8 @@ class GitHubCollector:
             repo_filter: Optional list of repository names to collect
             collection_id: Optional collection identifier for tracking
             resume: Whether to resume from a checkpoint
+            use_load_jobs: Publish via free bulk load jobs instead of
+                MERGE upserts (appends only; use for backfills)
         
         Returns:
             Dictionary with counts of inserted rows per table
@@ -551,13 +936,38 @@ class GitHubCollector:
                 logger.info(f"Resuming collection. Already completed: {len(completed_repos)} repos")
         
         # Fetch data from GitHub
-        pr_data = self.fetcher.fetch_organization_prs(
-            self.config.github_org,
-            since=since,
-            until=until,
-            parallel=True,
-            repo_filter=repo_filter
-        )
+        if self.config.use_graphql:
+            from modules.graphql_fetcher import GitHubGraphQLFetcher
+            graphql_fetcher = GitHubGraphQLFetcher(
+                self.config.github_token,
+                max_workers=self.config.max_workers
+            )
+            pr_data = graphql_fetcher.fetch_organization_prs(
+                self.config.github_org,
+                since=since,
+                until=until,
+                repo_filter=repo_filter
+            )
+        elif self.config.use_async_fetch:
+            import asyncio
+            watermarks = self._get_pr_watermarks(repo_filter)
+            pr_data = asyncio.run(self.fetcher.fetch_organization_prs_async(
+                self.config.github_org,
+                since=since,
+                until=until,
+                repo_filter=repo_filter,
+                watermarks=watermarks
+            ))
+        else:
+            watermarks = self._get_pr_watermarks(repo_filter)
+            pr_data = self.fetcher.fetch_organization_prs(
+                self.config.github_org,
+                since=since,
+                until=until,
+                parallel=True,
+                repo_filter=repo_filter,
+                watermarks=watermarks
+            )
         
         # Filter out already completed repos if resuming
         if completed_repos:
@@ -566,9 +976,20 @@ class GitHubCollector:
         
         # Persist to GCS if enabled
         if self.config.persist_to_gcs and self.storage:
-            logger.info("Persisting data to GCS first")
-            blob_paths = self.persist_to_gcs(pr_data, collection_id)
-            
+            # Publish straight from the in-memory data — re-downloading
+            # what we just uploaded would traverse the network twice,
+            # and the fused path prepares each repo's rows once for
+            # both destinations. Resumed runs go through GCS instead,
+            # because repos completed before the crash exist only there.
+            if resume and completed_repos:
+                logger.info("Persisting data to GCS first")
+                blob_paths = self.persist_to_gcs(pr_data, collection_id)
+                counts = None
+            else:
+                blob_paths, counts = self._persist_and_publish(
+                    pr_data, collection_id, use_load_jobs=use_load_jobs
+                )
+
             # Write checkpoint after persisting
             checkpoint_data = {
                 "completed_repos": list(pr_data.keys()),
@@ -578,23 +999,27 @@ class GitHubCollector:
                 "blob_paths": blob_paths
             }
             self.storage.write_checkpoint(self.config.github_org, collection_id, checkpoint_data)
-            
-            # Now load from GCS and publish to BigQuery
-            logger.info("Loading from GCS and publishing to BigQuery")
-            counts = self.load_from_gcs_and_publish()
+
+            if counts is None:
+                logger.info("Resumed run: loading from GCS and publishing to BigQuery")
+                counts = self.load_from_gcs_and_publish(use_load_jobs=use_load_jobs)
         else:
             # Direct publish to BigQuery (old behavior)
-            counts = self.publish_to_bigquery(pr_data)
+            counts = self.publish_to_bigquery(pr_data, use_load_jobs=use_load_jobs)
         
         return counts
     
-    def backfill(self, days: int = 180, repo_filter: Optional[List[str]] = None) -> Dict[str, int]:
+    def backfill(self, days: int = 180, repo_filter: Optional[List[str]] = None,
+                 use_load_jobs: bool = False) -> Dict[str, int]:
         """
         Backfill historical data
         
         Args:
             days: Number of days to backfill
             repo_filter: Optional list of repository names to backfill
+            use_load_jobs: Publish via free bulk load jobs instead of
+                MERGE upserts (much faster; appends only, so use on
+                empty or rebuilt tables)
         
         Returns:
             Dictionary with counts of inserted rows per table
@@ -604,7 +1029,8 @@ class GitHubCollector:
         until = datetime.now(timezone.utc)
         since = until - timedelta(days=days)
         
-        return self.collect_and_publish(since=since, until=until, repo_filter=repo_filter)
+        return self.collect_and_publish(since=since, until=until, repo_filter=repo_filter,
+                                        use_load_jobs=use_load_jobs)
     
     def incremental_collect(self, hours: int = 6, repo_filter: Optional[List[str]] = None) -> Dict[str, int]:
         """
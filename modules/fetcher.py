@@ -2,18 +2,50 @@
 GitHub Data Fetcher Module
 Fetches commits, PRs, reviews, and other data from GitHub repositories
 """
+import asyncio
 import logging
+import sys
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 
 from utils.github_client import GitHubClient
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+# fromisoformat on Python 3.11+ (the deployed runtime) parses the Z
+# suffix natively, so the old replace('Z', '+00:00') workaround is just
+# an extra string allocation per call
+_parse_iso = datetime.fromisoformat
+
+
+# Canonical size labels; membership is one C-level hash lookup, so the
+# common case resolves without a Python-level startswith scan
+_SIZE_LABELS = frozenset({
+    "size/XS", "size/S", "size/M", "size/L", "size/XL", "size/XXL",
+})
+
+
+def _parse_iso_opt(value: Optional[str]) -> Optional[datetime]:
+    """Parse an optional ISO timestamp"""
+    return _parse_iso(value) if value else None
+
+
+def _normalize_timestamp(value: str) -> str:
+    """
+    Normalize a GitHub API timestamp for BigQuery
+    
+    GitHub returns RFC 3339 with a Z suffix; rewriting the suffix is all
+    BigQuery needs, so skip the fromisoformat parse/format round-trip.
+    """
+    return value[:-1] + '+00:00' if value.endswith('Z') else value
+
+
+# slots=True drops the per-instance __dict__ (a few hundred bytes per
+# PR), which adds up across an org-wide backfill held in memory
+@dataclass(slots=True)
 class PullRequestData:
     """Structured pull request data"""
     pr_number: int
@@ -59,12 +91,19 @@ class PullRequestData:
     base_ref: str
     head_ref: str
     
+    # The only datetime-valued fields; everything else serializes as-is
+    _DATETIME_FIELDS = ('created_at', 'updated_at', 'closed_at', 'merged_at')
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization"""
-        data = asdict(self)
-        # Convert datetime objects to ISO strings
-        for key, value in data.items():
-            if isinstance(value, datetime):
+        # asdict() would deep-copy every nested commit/review/comment
+        # dict just so the serializer can read them once; a shallow
+        # field copy avoids those allocations. Callers treat the result
+        # as write-once output.
+        data = {name: getattr(self, name) for name in self.__dataclass_fields__}
+        for key in self._DATETIME_FIELDS:
+            value = data[key]
+            if value is not None:
                 data[key] = value.isoformat()
         return data
 
@@ -83,111 +122,197 @@ class GitHubFetcher:
         logger.info(f"Found {len(repos)} repositories")
         return repos
     
-    def _extract_size_label(self, labels: List[Dict[str, Any]]) -> Optional[str]:
-        """Extract size label from PR labels"""
-        for label in labels:
-            label_name = label.get('name', '')
-            if label_name.startswith('size/'):
-                return label_name
-        return None
-    
     def _fetch_pr_details(self, owner: str, repo: str, pr: Dict[str, Any]) -> Optional[PullRequestData]:
         """Fetch detailed information for a single PR"""
         pr_number = pr['number']
-        
+
         try:
             logger.debug(f"Fetching details for PR #{pr_number} in {owner}/{repo}")
-            
+
             # Fetch commits
             commits = []
             try:
                 commits = self.client.get_pr_commits(owner, repo, pr_number)
             except Exception as e:
                 logger.warning(f"Could not fetch commits for PR #{pr_number}: {e}")
-            
+
             # Fetch reviews
             reviews = []
             try:
                 reviews = self.client.get_pr_reviews(owner, repo, pr_number)
             except Exception as e:
                 logger.warning(f"Could not fetch reviews for PR #{pr_number}: {e}")
-            
+
             # Fetch review comments
             review_comments = []
             try:
                 review_comments = self.client.get_pr_review_comments(owner, repo, pr_number)
             except Exception as e:
                 logger.warning(f"Could not fetch review comments for PR #{pr_number}: {e}")
-            
+
             # Fetch issue comments
             issue_comments = []
             try:
                 issue_comments = self.client.get_issue_comments(owner, repo, pr_number)
             except Exception as e:
                 logger.warning(f"Could not fetch issue comments for PR #{pr_number}: {e}")
-            
-            # Extract labels
-            labels = [label['name'] for label in pr.get('labels', [])]
-            size_label = self._extract_size_label(pr.get('labels', []))
-            
-            # Determine author type
-            author = pr.get('user', {})
-            author_name = author.get('login', 'unknown')
-            author_type = author.get('type', 'User')
-            
-            # Parse dates
-            created_at = datetime.fromisoformat(pr['created_at'].replace('Z', '+00:00'))
-            updated_at = datetime.fromisoformat(pr['updated_at'].replace('Z', '+00:00'))
-            
-            closed_at = None
-            if pr.get('closed_at'):
-                closed_at = datetime.fromisoformat(pr['closed_at'].replace('Z', '+00:00'))
-            
-            merged_at = None
-            if pr.get('merged_at'):
-                merged_at = datetime.fromisoformat(pr['merged_at'].replace('Z', '+00:00'))
-            
-            return PullRequestData(
-                pr_number=pr_number,
-                title=pr.get('title', ''),
-                state=pr.get('state', 'unknown'),
-                author=author_name,
-                author_type=author_type,
-                created_at=created_at,
-                updated_at=updated_at,
-                closed_at=closed_at,
-                merged_at=merged_at,
-                repository=repo,
-                organization=owner,
-                url=pr.get('html_url', ''),
-                additions=pr.get('additions', 0),
-                deletions=pr.get('deletions', 0),
-                changed_files=pr.get('changed_files', 0),
-                labels=labels,
-                size_label=size_label,
-                commits=commits,
-                commit_count=len(commits),
-                reviews=reviews,
-                review_count=len(reviews),
-                review_comments=review_comments,
-                review_comment_count=len(review_comments),
-                issue_comments=issue_comments,
-                issue_comment_count=len(issue_comments),
-                is_draft=pr.get('draft', False),
-                is_merged=pr.get('merged', False),
-                merge_commit_sha=pr.get('merge_commit_sha'),
-                base_ref=pr.get('base', {}).get('ref', ''),
-                head_ref=pr.get('head', {}).get('ref', ''),
+
+            return self._build_pr_data(owner, repo, pr, commits, reviews,
+                                       review_comments, issue_comments)
+
+        except Exception as e:
+            logger.error(f"Error fetching details for PR #{pr_number} in {owner}/{repo}: {e}")
+            return None
+
+    async def _fetch_pr_details_async(self, client, owner: str, repo: str,
+                                      pr: Dict[str, Any]) -> Optional[PullRequestData]:
+        """Fetch detailed information for a single PR with concurrent sub-fetches"""
+        pr_number = pr['number']
+
+        try:
+            logger.debug(f"Fetching details for PR #{pr_number} in {owner}/{repo}")
+
+            # Fetch all four sub-resources concurrently
+            results = await asyncio.gather(
+                client.get_pr_commits(owner, repo, pr_number),
+                client.get_pr_reviews(owner, repo, pr_number),
+                client.get_pr_review_comments(owner, repo, pr_number),
+                client.get_issue_comments(owner, repo, pr_number),
+                return_exceptions=True
             )
-        
+
+            names = ('commits', 'reviews', 'review comments', 'issue comments')
+            cleaned = []
+            for name, result in zip(names, results):
+                if isinstance(result, BaseException):
+                    logger.warning(f"Could not fetch {name} for PR #{pr_number}: {result}")
+                    cleaned.append([])
+                else:
+                    cleaned.append(result)
+            commits, reviews, review_comments, issue_comments = cleaned
+
+            return self._build_pr_data(owner, repo, pr, commits, reviews,
+                                       review_comments, issue_comments)
+
         except Exception as e:
             logger.error(f"Error fetching details for PR #{pr_number} in {owner}/{repo}: {e}")
             return None
+
+    def _build_pr_data(self, owner: str, repo: str, pr: Dict[str, Any],
+                       commits: List[Dict[str, Any]],
+                       reviews: List[Dict[str, Any]],
+                       review_comments: List[Dict[str, Any]],
+                       issue_comments: List[Dict[str, Any]]) -> PullRequestData:
+        """Assemble a PullRequestData from a PR payload and its sub-resources"""
+        pr_number = pr['number']
+
+        # Normalize sub-resource timestamps once at fetch time, so row
+        # preparation and GCS replays pass them through verbatim instead
+        # of re-normalizing per row
+        for commit in commits:
+            commit_info = commit.get('commit', {})
+            for part in ('author', 'committer'):
+                who = commit_info.get(part)
+                if who and who.get('date'):
+                    who['date'] = _normalize_timestamp(who['date'])
+        for review in reviews:
+            if review.get('submitted_at'):
+                review['submitted_at'] = _normalize_timestamp(review['submitted_at'])
+        for comment_list in (review_comments, issue_comments):
+            for comment in comment_list:
+                for key in ('created_at', 'updated_at'):
+                    if comment.get(key):
+                        comment[key] = _normalize_timestamp(comment[key])
+
+        # Extract labels and the size label in one pass. Set membership
+        # catches the canonical sizes cheaply; the startswith fallback
+        # keeps custom size/* labels working
+        labels = []
+        size_label = None
+        for label in pr.get('labels', []):
+            name = label.get('name', '')
+            labels.append(name)
+            if size_label is None and (name in _SIZE_LABELS or name.startswith('size/')):
+                size_label = name
+        
+        # Determine author type
+        author = pr.get('user', {})
+        author_name = author.get('login', 'unknown')
+        author_type = author.get('type', 'User')
+        
+        # Parse dates
+        created_at = _parse_iso(pr['created_at'])
+        updated_at = _parse_iso(pr['updated_at'])
+        closed_at = _parse_iso_opt(pr.get('closed_at'))
+        merged_at = _parse_iso_opt(pr.get('merged_at'))
+        
+        # Intern the heavily repeated strings: one org and a handful of
+        # repos, states, author types and branch names recur across every
+        # PR, so sharing one object apiece saves real memory at scale
+        intern = sys.intern
+        
+        return PullRequestData(
+            pr_number=pr_number,
+            title=pr.get('title', ''),
+            state=intern(pr.get('state', 'unknown')),
+            author=intern(author_name),
+            author_type=intern(author_type),
+            created_at=created_at,
+            updated_at=updated_at,
+            closed_at=closed_at,
+            merged_at=merged_at,
+            repository=intern(repo),
+            organization=intern(owner),
+            url=pr.get('html_url', ''),
+            additions=pr.get('additions', 0),
+            deletions=pr.get('deletions', 0),
+            changed_files=pr.get('changed_files', 0),
+            labels=labels,
+            size_label=size_label,
+            commits=commits,
+            commit_count=len(commits),
+            reviews=reviews,
+            review_count=len(reviews),
+            review_comments=review_comments,
+            review_comment_count=len(review_comments),
+            issue_comments=issue_comments,
+            issue_comment_count=len(issue_comments),
+            is_draft=pr.get('draft', False),
+            is_merged=pr.get('merged', False),
+            merge_commit_sha=pr.get('merge_commit_sha'),
+            base_ref=intern(pr.get('base', {}).get('ref', '')),
+            head_ref=intern(pr.get('head', {}).get('ref', '')),
+        )
+    
+    def _filter_unchanged_prs(self, owner: str, repo: str,
+                              prs: List[Dict[str, Any]],
+                              known_updated_at: Optional[Dict[int, datetime]]) -> List[Dict[str, Any]]:
+        """
+        Drop PRs whose updated_at hasn't advanced past the stored watermark
+        
+        updated_at is GitHub's change fingerprint: if it matches what a
+        prior ingestion stored, the PR's commits/reviews/comments are
+        unchanged and the four sub-fetches can be skipped outright.
+        """
+        if not known_updated_at:
+            return prs
+        
+        fresh = []
+        for pr in prs:
+            stored = known_updated_at.get(pr['number'])
+            if stored is not None and _parse_iso(pr['updated_at']) <= stored:
+                continue
+            fresh.append(pr)
+        
+        if len(fresh) < len(prs):
+            logger.info(f"Skipping {len(prs) - len(fresh)} unchanged PRs in {owner}/{repo}")
+        return fresh
     
     def fetch_repository_prs(self, owner: str, repo: str, 
                            since: Optional[datetime] = None,
                            until: Optional[datetime] = None,
-                           parallel: bool = True) -> List[PullRequestData]:
+                           parallel: bool = True,
+                           known_updated_at: Optional[Dict[int, datetime]] = None) -> List[PullRequestData]:
         """
         Fetch pull requests and their details for a repository
         
@@ -197,6 +322,8 @@ class GitHubFetcher:
             since: Only fetch PRs updated after this date
             until: Only fetch PRs updated before this date
             parallel: Whether to fetch PR details in parallel
+            known_updated_at: updated_at watermarks already ingested, by
+                PR number; PRs at or behind their watermark are skipped
         
         Returns:
             List of PullRequestData objects
@@ -207,6 +334,8 @@ class GitHubFetcher:
         prs = self.client.get_pull_requests(owner, repo, state="all", since=since, until=until)
         logger.info(f"Found {len(prs)} PRs in {owner}/{repo}")
         
+        prs = self._filter_unchanged_prs(owner, repo, prs, known_updated_at)
+        
         if not prs:
             return []
         
@@ -239,7 +368,8 @@ class GitHubFetcher:
                               since: Optional[datetime] = None,
                               until: Optional[datetime] = None,
                               parallel: bool = True,
-                              repo_filter: Optional[List[str]] = None) -> Dict[str, List[PullRequestData]]:
+                              repo_filter: Optional[List[str]] = None,
+                              watermarks: Optional[Dict[str, Dict[int, datetime]]] = None) -> Dict[str, List[PullRequestData]]:
         """
         Fetch pull requests for all repositories in an organization
         
@@ -249,12 +379,17 @@ class GitHubFetcher:
             until: Only fetch PRs updated before this date
             parallel: Whether to fetch data in parallel
             repo_filter: Optional list of repository names to fetch (if None, fetch all)
+            watermarks: Per-repo updated_at watermarks already ingested;
+                unchanged PRs skip their sub-resource fetches
         
         Returns:
             Dictionary mapping repository names to lists of PullRequestData
         """
         logger.info(f"Fetching PRs for organization: {org}")
         
+        if watermarks is None:
+            watermarks = {}
+        
         # Get all repositories
         repos = self.fetch_organization_repos(org)
         
@@ -266,35 +401,51 @@ class GitHubFetcher:
         all_prs = {}
         
         if parallel and len(repos) > 1:
-            # Parallel processing across repositories
-            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(repos))) as executor:
-                future_to_repo = {
+            # One flat pool for the whole org: nested per-repo pools
+            # multiplied the live thread count (repos x max_workers)
+            # without adding throughput, since every thread waits on the
+            # same API. Listings are submitted first and each repo's PR
+            # detail tasks join the same queue as its listing completes.
+            all_prs = {repo['name']: [] for repo in repos}
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                listing_futures = {
                     executor.submit(
-                        self.fetch_repository_prs,
-                        org,
-                        repo['name'],
-                        since,
-                        until,
-                        parallel=True  # Also parallelize within each repo
+                        self.client.get_pull_requests,
+                        org, repo['name'], "all", since, until
                     ): repo['name']
                     for repo in repos
                 }
                 
-                for future in as_completed(future_to_repo):
-                    repo_name = future_to_repo[future]
+                detail_futures = []
+                for future in as_completed(listing_futures):
+                    repo_name = listing_futures[future]
                     try:
                         prs = future.result()
-                        all_prs[repo_name] = prs
-                        logger.info(f"Fetched {len(prs)} PRs from {repo_name}")
                     except Exception as e:
                         logger.error(f"Error fetching PRs from {repo_name}: {e}")
-                        all_prs[repo_name] = []
+                        continue
+                    logger.info(f"Found {len(prs)} PRs in {org}/{repo_name}")
+                    prs = self._filter_unchanged_prs(org, repo_name, prs,
+                                                     watermarks.get(repo_name))
+                    for pr in prs:
+                        detail_futures.append(
+                            (repo_name, executor.submit(self._fetch_pr_details, org, repo_name, pr))
+                        )
+                
+                for repo_name, future in detail_futures:
+                    pr_data = future.result()
+                    if pr_data:
+                        all_prs[repo_name].append(pr_data)
+            
+            for repo_name, prs in all_prs.items():
+                logger.info(f"Fetched {len(prs)} PRs from {repo_name}")
         else:
             # Sequential processing
             for repo in repos:
                 repo_name = repo['name']
                 try:
-                    prs = self.fetch_repository_prs(org, repo_name, since, until, parallel=False)
+                    prs = self.fetch_repository_prs(org, repo_name, since, until, parallel=False,
+                                                    known_updated_at=watermarks.get(repo_name))
                     all_prs[repo_name] = prs
                     logger.info(f"Fetched {len(prs)} PRs from {repo_name}")
                 except Exception as e:
@@ -303,6 +454,107 @@ class GitHubFetcher:
         
         total_prs = sum(len(prs) for prs in all_prs.values())
         logger.info(f"Fetched total of {total_prs} PRs from {len(all_prs)} repositories")
-        
+
+        return all_prs
+
+    async def fetch_repository_prs_async(self, client, owner: str, repo: str,
+                                         since: Optional[datetime] = None,
+                                         until: Optional[datetime] = None,
+                                         known_updated_at: Optional[Dict[int, datetime]] = None) -> List[PullRequestData]:
+        """
+        Fetch pull requests and their details for a repository (async)
+
+        Args:
+            client: AsyncGitHubClient to use for all requests
+            owner: Repository owner/organization
+            repo: Repository name
+            since: Only fetch PRs updated after this date
+            until: Only fetch PRs updated before this date
+
+        Returns:
+            List of PullRequestData objects
+        """
+        logger.info(f"Fetching PRs for {owner}/{repo}")
+
+        prs = await client.get_pull_requests(owner, repo, state="all", since=since, until=until)
+        logger.info(f"Found {len(prs)} PRs in {owner}/{repo}")
+
+        prs = self._filter_unchanged_prs(owner, repo, prs, known_updated_at)
+
+        if not prs:
+            return []
+
+        # Fan out PR detail fetches; concurrency is bounded by the
+        # client's semaphore
+        results = await asyncio.gather(
+            *[self._fetch_pr_details_async(client, owner, repo, pr) for pr in prs]
+        )
+        pr_data_list = [pr_data for pr_data in results if pr_data]
+
+        logger.info(f"Successfully fetched details for {len(pr_data_list)} PRs")
+        return pr_data_list
+
+    async def fetch_organization_prs_async(self, org: str,
+                                           since: Optional[datetime] = None,
+                                           until: Optional[datetime] = None,
+                                           repo_filter: Optional[List[str]] = None,
+                                           watermarks: Optional[Dict[str, Dict[int, datetime]]] = None) -> Dict[str, List[PullRequestData]]:
+        """
+        Fetch pull requests for all repositories in an organization (async)
+
+        All requests share one HTTP session and event loop, so thousands
+        of PR sub-fetches can be in flight without per-request threads.
+
+        Args:
+            org: Organization name
+            since: Only fetch PRs updated after this date
+            until: Only fetch PRs updated before this date
+            repo_filter: Optional list of repository names to fetch (if None, fetch all)
+
+        Returns:
+            Dictionary mapping repository names to lists of PullRequestData
+        """
+        from utils.async_github_client import AsyncGitHubClient
+
+        logger.info(f"Fetching PRs for organization: {org}")
+
+        if watermarks is None:
+            watermarks = {}
+
+        # A coroutine in flight is far cheaper than a thread, so the
+        # async path can afford a much wider fan-out than max_workers
+        async with AsyncGitHubClient(
+            self.client.token,
+            self.client.rate_limiter.max_requests_per_hour,
+            max_concurrency=self.max_workers * 4
+        ) as client:
+            repos = await client.get_org_repos(org)
+            logger.info(f"Found {len(repos)} repositories")
+
+            if repo_filter:
+                repos = [r for r in repos if r['name'] in repo_filter]
+                logger.info(f"Filtered to {len(repos)} repositories")
+
+            tasks = {
+                repo['name']: asyncio.create_task(
+                    self.fetch_repository_prs_async(client, org, repo['name'], since, until,
+                                                    known_updated_at=watermarks.get(repo['name']))
+                )
+                for repo in repos
+            }
+
+            all_prs = {}
+            for repo_name, task in tasks.items():
+                try:
+                    prs = await task
+                    all_prs[repo_name] = prs
+                    logger.info(f"Fetched {len(prs)} PRs from {repo_name}")
+                except Exception as e:
+                    logger.error(f"Error fetching PRs from {repo_name}: {e}")
+                    all_prs[repo_name] = []
+
+        total_prs = sum(len(prs) for prs in all_prs.values())
+        logger.info(f"Fetched total of {total_prs} PRs from {len(all_prs)} repositories")
+
         return all_prs
 
@@ -3,6 +3,7 @@ BigQuery Schema Module
 Creates and manages BigQuery datasets and tables for GitHub stats
 """
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from google.cloud import bigquery
@@ -11,6 +12,125 @@ from google.cloud.exceptions import NotFound, Conflict
 logger = logging.getLogger(__name__)
 
 
+# Table schemas are immutable; building the SchemaField lists once at
+# import time saves re-constructing ~150 objects on every table create
+# or schema lookup. The accessors hand out fresh lists so callers can
+# append without touching the shared tuples.
+_PULL_REQUESTS_SCHEMA = (
+    bigquery.SchemaField("pr_number", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("title", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("state", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("author", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("author_type", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("created_at", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("closed_at", "TIMESTAMP", mode="NULLABLE"),
+    bigquery.SchemaField("merged_at", "TIMESTAMP", mode="NULLABLE"),
+    bigquery.SchemaField("url", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("additions", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("deletions", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("changed_files", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("labels", "STRING", mode="REPEATED"),
+    bigquery.SchemaField("size_label", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("commit_count", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("review_count", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("review_comment_count", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("issue_comment_count", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("is_draft", "BOOLEAN", mode="REQUIRED"),
+    bigquery.SchemaField("is_merged", "BOOLEAN", mode="REQUIRED"),
+    bigquery.SchemaField("merge_commit_sha", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("base_ref", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("head_ref", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("ingestion_timestamp", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("batch_id", "STRING", mode="NULLABLE"),
+)
+
+_COMMITS_SCHEMA = (
+    bigquery.SchemaField("sha", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("pr_number", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("author", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("author_email", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("committer", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("committer_email", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("message", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("commit_date", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("author_date", "TIMESTAMP", mode="NULLABLE"),
+    bigquery.SchemaField("url", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("ingestion_timestamp", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("batch_id", "STRING", mode="NULLABLE"),
+)
+
+_REVIEWS_SCHEMA = (
+    bigquery.SchemaField("review_id", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("pr_number", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("reviewer", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("reviewer_type", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("state", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("body", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("submitted_at", "TIMESTAMP", mode="NULLABLE"),
+    bigquery.SchemaField("commit_id", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("url", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("ingestion_timestamp", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("batch_id", "STRING", mode="NULLABLE"),
+)
+
+_REVIEW_COMMENTS_SCHEMA = (
+    bigquery.SchemaField("comment_id", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("pr_number", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("author", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("author_type", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("body", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("created_at", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("path", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("position", "INTEGER", mode="NULLABLE"),
+    bigquery.SchemaField("commit_id", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("url", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("ingestion_timestamp", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("batch_id", "STRING", mode="NULLABLE"),
+)
+
+_ISSUE_COMMENTS_SCHEMA = (
+    bigquery.SchemaField("comment_id", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("pr_number", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("author", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("author_type", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("body", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("created_at", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("url", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("ingestion_timestamp", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("batch_id", "STRING", mode="NULLABLE"),
+)
+
+_METRICS_SCHEMA = (
+    bigquery.SchemaField("metric_date", "DATE", mode="REQUIRED"),
+    bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("author", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("author_type", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("prs_opened", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("prs_merged", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("prs_closed", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("commits_count", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("reviews_given", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("review_comments_given", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("lines_added", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("lines_deleted", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("files_changed", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("calculation_timestamp", "TIMESTAMP", mode="REQUIRED"),
+)
+
 class BigQuerySchema:
     """Manages BigQuery schema creation and updates"""
     
@@ -36,126 +156,28 @@ class BigQuerySchema:
             return self.client.create_dataset(dataset, exists_ok=exists_ok)
     
     def _get_pull_requests_schema(self) -> List[bigquery.SchemaField]:
-        """Define schema for pull requests table"""
-        return [
-            bigquery.SchemaField("pr_number", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("title", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("state", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("author", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("author_type", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("created_at", "TIMESTAMP", mode="REQUIRED"),
-            bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
-            bigquery.SchemaField("closed_at", "TIMESTAMP", mode="NULLABLE"),
-            bigquery.SchemaField("merged_at", "TIMESTAMP", mode="NULLABLE"),
-            bigquery.SchemaField("url", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("additions", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("deletions", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("changed_files", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("labels", "STRING", mode="REPEATED"),
-            bigquery.SchemaField("size_label", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("commit_count", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("review_count", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("review_comment_count", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("issue_comment_count", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("is_draft", "BOOLEAN", mode="REQUIRED"),
-            bigquery.SchemaField("is_merged", "BOOLEAN", mode="REQUIRED"),
-            bigquery.SchemaField("merge_commit_sha", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("base_ref", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("head_ref", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("ingestion_timestamp", "TIMESTAMP", mode="REQUIRED"),
-        ]
+        """Schema for the pull requests table (shared prebuilt fields)"""
+        return list(_PULL_REQUESTS_SCHEMA)
     
     def _get_commits_schema(self) -> List[bigquery.SchemaField]:
-        """Define schema for commits table"""
-        return [
-            bigquery.SchemaField("sha", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("pr_number", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("author", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("author_email", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("committer", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("committer_email", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("message", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("commit_date", "TIMESTAMP", mode="REQUIRED"),
-            bigquery.SchemaField("author_date", "TIMESTAMP", mode="NULLABLE"),
-            bigquery.SchemaField("url", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("ingestion_timestamp", "TIMESTAMP", mode="REQUIRED"),
-        ]
+        """Schema for the commits table (shared prebuilt fields)"""
+        return list(_COMMITS_SCHEMA)
     
     def _get_reviews_schema(self) -> List[bigquery.SchemaField]:
-        """Define schema for reviews table"""
-        return [
-            bigquery.SchemaField("review_id", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("pr_number", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("reviewer", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("reviewer_type", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("state", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("body", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("submitted_at", "TIMESTAMP", mode="NULLABLE"),
-            bigquery.SchemaField("commit_id", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("url", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("ingestion_timestamp", "TIMESTAMP", mode="REQUIRED"),
-        ]
+        """Schema for the reviews table (shared prebuilt fields)"""
+        return list(_REVIEWS_SCHEMA)
     
     def _get_review_comments_schema(self) -> List[bigquery.SchemaField]:
-        """Define schema for review comments table"""
-        return [
-            bigquery.SchemaField("comment_id", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("pr_number", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("author", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("author_type", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("body", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("created_at", "TIMESTAMP", mode="REQUIRED"),
-            bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
-            bigquery.SchemaField("path", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("position", "INTEGER", mode="NULLABLE"),
-            bigquery.SchemaField("commit_id", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("url", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("ingestion_timestamp", "TIMESTAMP", mode="REQUIRED"),
-        ]
+        """Schema for the review comments table (shared prebuilt fields)"""
+        return list(_REVIEW_COMMENTS_SCHEMA)
     
     def _get_issue_comments_schema(self) -> List[bigquery.SchemaField]:
-        """Define schema for issue/PR comments table"""
-        return [
-            bigquery.SchemaField("comment_id", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("pr_number", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("author", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("author_type", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("body", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("created_at", "TIMESTAMP", mode="REQUIRED"),
-            bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
-            bigquery.SchemaField("url", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("ingestion_timestamp", "TIMESTAMP", mode="REQUIRED"),
-        ]
+        """Schema for the issue/PR comments table (shared prebuilt fields)"""
+        return list(_ISSUE_COMMENTS_SCHEMA)
     
     def _get_metrics_schema(self) -> List[bigquery.SchemaField]:
-        """Define schema for derived metrics table"""
-        return [
-            bigquery.SchemaField("metric_date", "DATE", mode="REQUIRED"),
-            bigquery.SchemaField("repository", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("organization", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("author", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("author_type", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("prs_opened", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("prs_merged", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("prs_closed", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("commits_count", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("reviews_given", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("review_comments_given", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("lines_added", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("lines_deleted", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("files_changed", "INTEGER", mode="REQUIRED"),
-            bigquery.SchemaField("calculation_timestamp", "TIMESTAMP", mode="REQUIRED"),
-        ]
+        """Schema for the derived metrics table (shared prebuilt fields)"""
+        return list(_METRICS_SCHEMA)
     
     def create_table(self, table_id: str, schema: List[bigquery.SchemaField],
                     partition_field: Optional[str] = None,
@@ -192,55 +214,42 @@ class BigQuerySchema:
         # Ensure dataset exists
         self.create_dataset()
         
-        tables = {}
-        
-        # Pull Requests table
-        tables['pull_requests'] = self.create_table(
-            "pull_requests",
-            self._get_pull_requests_schema(),
-            partition_field="updated_at",
-            clustering_fields=["organization", "repository", "author"]
-        )
-        
-        # Commits table
-        tables['commits'] = self.create_table(
-            "commits",
-            self._get_commits_schema(),
-            partition_field="commit_date",
-            clustering_fields=["organization", "repository", "author"]
-        )
-        
-        # Reviews table
-        tables['reviews'] = self.create_table(
-            "reviews",
-            self._get_reviews_schema(),
-            partition_field="submitted_at",
-            clustering_fields=["organization", "repository", "reviewer"]
-        )
-        
-        # Review Comments table
-        tables['review_comments'] = self.create_table(
-            "review_comments",
-            self._get_review_comments_schema(),
-            partition_field="created_at",
-            clustering_fields=["organization", "repository", "author"]
-        )
-        
-        # Issue Comments table
-        tables['issue_comments'] = self.create_table(
-            "issue_comments",
-            self._get_issue_comments_schema(),
-            partition_field="created_at",
-            clustering_fields=["organization", "repository", "author"]
-        )
+        # Clustering leads with repository: a deployment collects one
+        # organization, so clustering on it first wasted the leftmost
+        # (most selective) cluster column and hurt block pruning for the
+        # repository/author filters the metric queries actually use
+        table_defs = [
+            # pull_requests partitions on created_at (immutable) rather
+            # than updated_at: an update moved rows between partitions on
+            # every MERGE. updated_at joins the clustering columns so
+            # range filters on it still prune blocks.
+            ("pull_requests", self._get_pull_requests_schema(),
+             "created_at", ["repository", "author", "state", "updated_at"]),
+            ("commits", self._get_commits_schema(),
+             "commit_date", ["repository", "author"]),
+            ("reviews", self._get_reviews_schema(),
+             "submitted_at", ["repository", "reviewer"]),
+            ("review_comments", self._get_review_comments_schema(),
+             "created_at", ["repository", "author"]),
+            ("issue_comments", self._get_issue_comments_schema(),
+             "created_at", ["repository", "author"]),
+            ("metrics", self._get_metrics_schema(),
+             "metric_date", ["repository", "author"]),
+        ]
         
-        # Metrics table
-        tables['metrics'] = self.create_table(
-            "metrics",
-            self._get_metrics_schema(),
-            partition_field="metric_date",
-            clustering_fields=["organization", "repository", "author"]
-        )
+        # Each create/get is an independent round-trip to BigQuery, so
+        # probe/create all tables concurrently instead of serially
+        with ThreadPoolExecutor(max_workers=len(table_defs)) as executor:
+            futures = {
+                table_id: executor.submit(
+                    self.create_table, table_id, schema,
+                    partition_field=partition_field,
+                    clustering_fields=clustering_fields
+                )
+                for table_id, schema, partition_field, clustering_fields in table_defs
+            }
+            tables = {table_id: future.result()
+                      for table_id, future in futures.items()}
         
         logger.info(f"Created {len(tables)} tables")
         return tables
@@ -0,0 +1,265 @@
+"""
+Async GitHub API Client with rate limiting support
+
+Async counterpart of GitHubClient for high-concurrency fetch fan-out.
+A single shared aiohttp session multiplexes all requests, and an
+asyncio.Semaphore bounds the number of in-flight calls.
+"""
+import asyncio
+import time
+import logging
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRateLimiter:
+    """
+    Paces GitHub API requests with a lazy token bucket (async)
+
+    Same algorithm as the sync RateLimiter: the bucket refills at
+    max_requests_per_hour / 3600 tokens per second from elapsed time,
+    so requests are smoothed instead of bursting then sleeping out an
+    hourly window. The lock serializes refills across coroutines.
+    """
+
+    def __init__(self, max_requests_per_hour: int = 4500):
+        self.max_requests_per_hour = max_requests_per_hour
+        self.rate = max_requests_per_hour / 3600.0
+        self.capacity = float(max_requests_per_hour)
+        self.tokens = float(max_requests_per_hour)
+        self.last_refill = time.monotonic()
+        self.remaining = None
+        self.reset_time = None
+        self._lock = asyncio.Lock()
+
+    async def wait_if_needed(self):
+        """Take one token, sleeping only as long as the bucket requires"""
+        async with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+
+            # GitHub's counter is authoritative: never hold more tokens
+            # than the server says are left in the window
+            if self.remaining is not None and self.tokens > self.remaining:
+                self.tokens = float(self.remaining)
+
+            if self.tokens < 1:
+                current_time = time.time()
+                if (self.remaining is not None and self.remaining < 1
+                        and self.reset_time and self.reset_time > current_time):
+                    # Server quota exhausted: nothing to do but wait it out
+                    wait_time = self.reset_time - current_time + 1
+                    logger.warning(f"Rate limit exhausted. Waiting {wait_time:.0f}s")
+                    await asyncio.sleep(wait_time)
+                    self.remaining = None
+                    self.tokens = self.capacity
+                else:
+                    # Pace by the slower of the configured rate and the
+                    # server's window: spacing the remaining quota
+                    # evenly across the time to reset avoids burning it
+                    # early and hitting the hard exhaustion wait
+                    rate = self.rate
+                    if (self.remaining and self.reset_time
+                            and self.reset_time > current_time):
+                        rate = min(rate, self.remaining / (self.reset_time - current_time))
+                    wait_time = (1 - self.tokens) / rate
+                    await asyncio.sleep(wait_time)
+                    self.tokens = 1.0
+                self.last_refill = time.monotonic()
+
+            self.tokens -= 1
+
+    def update_from_headers(self, headers):
+        """Update rate limit info from response headers"""
+        try:
+            self.remaining = int(headers.get('X-RateLimit-Remaining', 5000))
+            self.reset_time = int(headers.get('X-RateLimit-Reset', 0))
+        except (ValueError, TypeError):
+            pass
+
+
+class AsyncGitHubClient:
+    """Async GitHub API client with rate limiting and retry logic"""
+
+    def __init__(self, token: str, max_requests_per_hour: int = 4500,
+                 max_concurrency: int = 10):
+        self.token = token
+        self.base_url = "https://api.github.com"
+        self.rate_limiter = AsyncRateLimiter(max_requests_per_hour)
+        self.max_concurrency = max_concurrency
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncGitHubClient":
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency * 4),
+            timeout=aiohttp.ClientTimeout(total=60),
+            headers={
+                "Authorization": f"token {self.token}",
+                "Accept": "application/vnd.github.v3+json",
+            },
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _make_request(self, method: str, endpoint: str,
+                            **kwargs) -> Any:
+        """Make a request with rate limiting and retries"""
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+
+        for attempt in range(5):
+            await self.rate_limiter.wait_if_needed()
+
+            async with self._semaphore:
+                async with self._session.request(method, url, **kwargs) as response:
+                    self.rate_limiter.update_from_headers(response.headers)
+
+                    # Honor server-requested backoff on rate limit hits
+                    if response.status in (403, 429):
+                        retry_after = response.headers.get('Retry-After')
+                        if retry_after:
+                            wait_time = int(retry_after)
+                            logger.warning(f"Rate limited. Waiting {wait_time}s")
+                            await asyncio.sleep(wait_time)
+                            continue
+                        # Quota exhaustion carries no Retry-After; wait
+                        # for the advertised reset. The shared limiter
+                        # (now at remaining=0) holds back the other
+                        # coroutines until the same moment.
+                        if response.headers.get('X-RateLimit-Remaining') == '0':
+                            reset = int(response.headers.get('X-RateLimit-Reset', '0') or 0)
+                            wait_time = max(reset - time.time(), 0) + 1
+                            logger.warning(f"Rate limit exhausted. Waiting {wait_time:.0f}s")
+                            await asyncio.sleep(wait_time)
+                            continue
+
+                    if response.status in (500, 502, 503, 504):
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+
+                    response.raise_for_status()
+                    data = await response.json()
+                    return data, response.headers
+
+        raise aiohttp.ClientError(f"Request failed after retries: {url}")
+
+    async def get(self, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Make a GET request"""
+        data, _ = await self._make_request("GET", endpoint, **kwargs)
+        return data
+
+    async def get_paginated(self, endpoint: str, params: Optional[Dict] = None,
+                            max_pages: Optional[int] = None,
+                            stop_predicate: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Get all pages of a paginated endpoint
+
+        stop_predicate, if given, is called per item: results are
+        truncated at the first item it matches and no further pages are
+        fetched.
+        """
+        if params is None:
+            params = {}
+
+        params.setdefault('per_page', 100)
+
+        results = []
+        page = 1
+
+        while True:
+            if max_pages and page > max_pages:
+                break
+
+            params['page'] = page
+            data, headers = await self._make_request("GET", endpoint, params=dict(params))
+
+            if not data:
+                break
+
+            items = data if isinstance(data, list) else [data]
+            if stop_predicate:
+                for idx, item in enumerate(items):
+                    if stop_predicate(item):
+                        results.extend(items[:idx])
+                        return results
+            results.extend(items)
+
+            # Check if there's a next page
+            links = headers.get('Link', '')
+            if 'rel="next"' not in links:
+                break
+
+            page += 1
+            logger.debug(f"Fetching page {page} of {endpoint}")
+
+        return results
+
+    async def get_org_repos(self, org: str) -> List[Dict[str, Any]]:
+        """Get all repositories for an organization"""
+        logger.info(f"Fetching repositories for organization: {org}")
+        return await self.get_paginated(f"/orgs/{org}/repos", params={"type": "all"})
+
+    async def get_pull_requests(self, owner: str, repo: str,
+                                state: str = "all",
+                                since: Optional[datetime] = None,
+                                until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Get pull requests for a repository"""
+        logger.info(f"Fetching PRs for {owner}/{repo} (state={state})")
+
+        params = {
+            "state": state,
+            "sort": "updated",
+            "direction": "desc",
+        }
+
+        # Sorted by updated_at descending: stop paginating at the first
+        # PR older than `since` instead of fetching the full history
+        stop_predicate = None
+        if since:
+            stop_predicate = lambda pr: datetime.fromisoformat(pr['updated_at']) < since
+
+        prs = await self.get_paginated(f"/repos/{owner}/{repo}/pulls", params=params,
+                                       stop_predicate=stop_predicate)
+
+        # Filter by date if specified. The since bound was already
+        # enforced during pagination by the stop predicate, so only
+        # until needs a client-side pass — no PR gets parsed twice.
+        if until:
+            filtered_prs = []
+            for pr in prs:
+                updated_at = datetime.fromisoformat(pr['updated_at'])
+                if updated_at > until:
+                    continue
+                filtered_prs.append(pr)
+            return filtered_prs
+
+        return prs
+
+    async def get_pr_commits(self, owner: str, repo: str, pr_number: int) -> List[Dict[str, Any]]:
+        """Get commits for a pull request"""
+        return await self.get_paginated(f"/repos/{owner}/{repo}/pulls/{pr_number}/commits")
+
+    async def get_pr_reviews(self, owner: str, repo: str, pr_number: int) -> List[Dict[str, Any]]:
+        """Get reviews for a pull request"""
+        return await self.get_paginated(f"/repos/{owner}/{repo}/pulls/{pr_number}/reviews")
+
+    async def get_pr_review_comments(self, owner: str, repo: str, pr_number: int) -> List[Dict[str, Any]]:
+        """Get review comments for a pull request"""
+        return await self.get_paginated(f"/repos/{owner}/{repo}/pulls/{pr_number}/comments")
+
+    async def get_issue_comments(self, owner: str, repo: str, issue_number: int) -> List[Dict[str, Any]]:
+        """Get issue comments (includes PR comments)"""
+        return await self.get_paginated(f"/repos/{owner}/{repo}/issues/{issue_number}/comments")
@@ -0,0 +1,69 @@
+"""
+ETag Cache Module
+Persists GitHub ETags and response bodies for conditional requests
+"""
+import logging
+import sqlite3
+import threading
+import zlib
+from typing import Any, Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class ETagCache:
+    """
+    SQLite-backed cache of ETags and response bodies
+
+    GitHub honors If-None-Match and answers 304 Not Modified without
+    consuming rate limit, so persisting ETags across runs turns every
+    unchanged endpoint (most PR sub-resources on an incremental run)
+    into a free cache hit instead of a full re-download.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # One shared connection guarded by a lock: requests come from
+        # the fetcher's worker threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS etag_cache ("
+            "  key TEXT PRIMARY KEY,"
+            "  etag TEXT NOT NULL,"
+            "  has_next INTEGER NOT NULL,"
+            "  body BLOB NOT NULL"
+            ")"
+        )
+        self._conn.commit()
+        logger.info(f"Using ETag cache at {path}")
+
+    def get(self, key: str) -> Optional[Tuple[str, bool, Any]]:
+        """Look up a cached response; returns (etag, has_next, data) or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, has_next, body FROM etag_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, has_next, body = row
+        return etag, bool(has_next), orjson.loads(zlib.decompress(body))
+
+    def put(self, key: str, etag: str, has_next: bool, data: Any):
+        """Store a response body and its ETag"""
+        body = zlib.compress(orjson.dumps(data))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO etag_cache (key, etag, has_next, body) "
+                "VALUES (?, ?, ?, ?)",
+                (key, etag, int(has_next), body)
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying connection"""
+        with self._lock:
+            self._conn.close()
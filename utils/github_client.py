@@ -1,73 +1,116 @@
 """
 GitHub API Client with rate limiting support
 """
+import re
 import time
 import logging
-from typing import Dict, List, Optional, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Union
 from datetime import datetime, timezone
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from utils.etag_cache import ETagCache
+
 logger = logging.getLogger(__name__)
 
+# Extracts the last page number from a Link header's rel="last" entry
+_LAST_PAGE_RE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+# Concurrent page fetches per get_paginated call once the page count is
+# known from rel="last"
+_PAGE_FETCH_WORKERS = 8
+
 
 class RateLimiter:
-    """Handles GitHub API rate limiting"""
+    """
+    Paces GitHub API requests with a lazy token bucket
+    
+    The bucket refills continuously at max_requests_per_hour / 3600
+    tokens per second, computed from elapsed time on each call — no
+    background thread or timer. Compared to the old hourly counter this
+    smooths requests instead of bursting then sleeping out the window,
+    and only ever waits as long as the next token (or GitHub's own
+    reset) requires. A lock serializes refills across the fetch worker
+    and page fan-out threads sharing one client.
+    """
     
     def __init__(self, max_requests_per_hour: int = 4500):
         self.max_requests_per_hour = max_requests_per_hour
-        self.requests_made = 0
-        self.window_start = time.time()
+        self.rate = max_requests_per_hour / 3600.0
+        self.capacity = float(max_requests_per_hour)
+        self.tokens = float(max_requests_per_hour)
+        self.last_refill = time.monotonic()
         self.remaining = None
         self.reset_time = None
+        self._lock = threading.Lock()
     
     def wait_if_needed(self):
-        """Wait if we're approaching rate limits"""
-        current_time = time.time()
-        
-        # Reset counter if we're in a new hour
-        if current_time - self.window_start >= 3600:
-            self.requests_made = 0
-            self.window_start = current_time
-        
-        # Check if we need to wait based on GitHub's rate limit info
-        if self.remaining is not None and self.remaining < 100:
-            if self.reset_time and self.reset_time > current_time:
-                wait_time = self.reset_time - current_time + 1
-                logger.warning(f"Rate limit low ({self.remaining} remaining). Waiting {wait_time:.0f}s")
-                time.sleep(wait_time)
-                self.requests_made = 0
-                return
-        
-        # Check if we're making too many requests per hour
-        if self.requests_made >= self.max_requests_per_hour:
-            elapsed = current_time - self.window_start
-            if elapsed < 3600:
-                wait_time = 3600 - elapsed
-                logger.warning(f"Local rate limit reached. Waiting {wait_time:.0f}s")
-                time.sleep(wait_time)
-                self.requests_made = 0
-                self.window_start = time.time()
+        """Take one token, sleeping only as long as the bucket requires"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            
+            # GitHub's counter is authoritative: never hold more tokens
+            # than the server says are left in the window
+            if self.remaining is not None and self.tokens > self.remaining:
+                self.tokens = float(self.remaining)
+            
+            if self.tokens < 1:
+                current_time = time.time()
+                if (self.remaining is not None and self.remaining < 1
+                        and self.reset_time and self.reset_time > current_time):
+                    # Server quota exhausted: nothing to do but wait it out
+                    wait_time = self.reset_time - current_time + 1
+                    logger.warning(f"Rate limit exhausted. Waiting {wait_time:.0f}s")
+                    time.sleep(wait_time)
+                    self.remaining = None
+                    self.tokens = self.capacity
+                else:
+                    # Pace by the slower of the configured rate and the
+                    # server's window: spacing the remaining quota evenly
+                    # across the time to reset avoids burning it early
+                    # and hitting the hard exhaustion wait
+                    rate = self.rate
+                    if (self.remaining and self.reset_time
+                            and self.reset_time > current_time):
+                        rate = min(rate, self.remaining / (self.reset_time - current_time))
+                    wait_time = (1 - self.tokens) / rate
+                    time.sleep(wait_time)
+                    self.tokens = 1.0
+                self.last_refill = time.monotonic()
+            
+            self.tokens -= 1
     
     def update_from_headers(self, headers: Dict[str, str]):
         """Update rate limit info from response headers"""
         try:
-            self.remaining = int(headers.get('X-RateLimit-Remaining', 5000))
-            self.reset_time = int(headers.get('X-RateLimit-Reset', 0))
+            remaining = int(headers.get('X-RateLimit-Remaining', 5000))
+            reset_time = int(headers.get('X-RateLimit-Reset', 0))
         except (ValueError, TypeError):
-            pass
-        
-        self.requests_made += 1
+            return
+        with self._lock:
+            self.remaining = remaining
+            self.reset_time = reset_time
 
 
 class GitHubClient:
     """GitHub API client with rate limiting and retry logic"""
     
-    def __init__(self, token: str, max_requests_per_hour: int = 4500):
-        self.token = token
+    def __init__(self, token: Union[str, List[str]], max_requests_per_hour: int = 4500,
+                 etag_cache: Optional[ETagCache] = None):
+        # Accept one token or a pool; each request uses the token with
+        # the most remaining quota, so N tokens give ~N times the
+        # effective rate limit
+        self.tokens = [token] if isinstance(token, str) else list(token)
+        self.etag_cache = etag_cache
+        self.token = self.tokens[0]
+        self._token_remaining: Dict[str, Optional[int]] = {t: None for t in self.tokens}
         self.base_url = "https://api.github.com"
-        self.rate_limiter = RateLimiter(max_requests_per_hour)
+        self.rate_limiter = RateLimiter(max_requests_per_hour * len(self.tokens))
         
         # Setup session with retry logic
         self.session = requests.Session()
@@ -77,65 +120,182 @@ class GitHubClient:
             status_forcelist=[429, 500, 502, 503, 504],
             allowed_methods=["GET", "POST"]
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # Default pools hold 10 connections; with page fan-out and
+        # per-PR detail threads sharing this session, overflow requests
+        # would discard connections and pay a fresh TLS handshake each
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_connections=32,
+            pool_maxsize=64,
+        )
         self.session.mount("https://", adapter)
         self.session.mount("http://", adapter)
         
         self.session.headers.update({
-            "Authorization": f"token {token}",
+            "Authorization": f"token {self.token}",
             "Accept": "application/vnd.github.v3+json",
         })
     
+    def _pick_token(self) -> str:
+        """Pick the token with the highest remaining quota"""
+        if len(self.tokens) == 1:
+            return self.token
+        # Unknown quota counts as full — prefer untouched tokens
+        return max(self.tokens,
+                   key=lambda t: self._token_remaining[t]
+                   if self._token_remaining[t] is not None else 5000)
+    
     def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """Make a request with rate limiting"""
-        self.rate_limiter.wait_if_needed()
-        
+        base_headers = kwargs.pop('headers', None) or {}
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        response = self.session.request(method, url, **kwargs)
-        
-        # Update rate limiter with response headers
-        self.rate_limiter.update_from_headers(response.headers)
         
-        response.raise_for_status()
-        return response
+        for attempt in range(2):
+            # The limiter tracks the last-used token; since we always pick
+            # the token with the most quota left, hitting its low-water mark
+            # means the whole pool is depleted and waiting is correct
+            self.rate_limiter.wait_if_needed()
+            
+            token = self._pick_token()
+            headers = dict(base_headers)
+            headers.setdefault('Authorization', f"token {token}")
+            
+            response = self.session.request(method, url, headers=headers, **kwargs)
+            
+            # Update rate limiter and the per-token quota tracker
+            self.rate_limiter.update_from_headers(response.headers)
+            try:
+                self._token_remaining[token] = int(response.headers.get('X-RateLimit-Remaining'))
+            except (ValueError, TypeError):
+                pass
+            
+            # Quota exhaustion comes back as 403, which the session's
+            # Retry policy doesn't cover; sleep until the advertised
+            # reset and retry once rather than thrashing — the shared
+            # limiter (now holding remaining=0) pauses the other
+            # workers until the same reset
+            if (response.status_code == 403 and attempt == 0
+                    and response.headers.get('X-RateLimit-Remaining') == '0'):
+                reset = int(response.headers.get('X-RateLimit-Reset', 0) or 0)
+                wait_time = max(reset - time.time(), 0) + 1
+                logger.warning(f"Rate limit exhausted. Waiting {wait_time:.0f}s")
+                time.sleep(wait_time)
+                continue
+            
+            response.raise_for_status()
+            return response
     
     def get(self, endpoint: str, **kwargs) -> Dict[str, Any]:
         """Make a GET request"""
         response = self._make_request("GET", endpoint, **kwargs)
         return response.json()
     
+    def _get_page(self, endpoint: str, params: Dict, page: int):
+        """
+        Fetch one page of a paginated endpoint
+        
+        Uses the ETag cache for a conditional request when enabled: the
+        saved body is served on 304 Not Modified, which GitHub answers
+        without consuming rate limit.
+        
+        Returns:
+            Tuple of (data, has_next, link_header)
+        """
+        params = dict(params, page=page)
+        
+        cached = None
+        headers = {}
+        cache_key = None
+        if self.etag_cache:
+            cache_key = f"{endpoint}?" + "&".join(
+                f"{key}={params[key]}" for key in sorted(params))
+            cached = self.etag_cache.get(cache_key)
+            if cached:
+                headers['If-None-Match'] = cached[0]
+        
+        response = self._make_request("GET", endpoint, params=params, headers=headers)
+        
+        if response.status_code == 304 and cached:
+            _, has_next, data = cached
+            return data, has_next, None
+        
+        data = response.json()
+        link = response.headers.get('Link', '')
+        has_next = 'rel="next"' in link
+        etag = response.headers.get('ETag')
+        if self.etag_cache and etag:
+            self.etag_cache.put(cache_key, etag, has_next, data)
+        return data, has_next, link
+    
     def get_paginated(self, endpoint: str, params: Optional[Dict] = None, 
-                     max_pages: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Get all pages of a paginated endpoint"""
+                     max_pages: Optional[int] = None,
+                     stop_predicate: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Get all pages of a paginated endpoint
+        
+        The first response's rel="last" link reveals the page count, so
+        the remaining pages are fetched concurrently instead of walking
+        rel="next" one round-trip at a time. Falls back to the
+        sequential walk when the header is absent (or the first page
+        came from the ETag cache).
+        
+        stop_predicate, if given, is called per item: results are
+        truncated at the first item it matches and no further pages are
+        fetched. Useful for sorted endpoints where everything past a
+        cutoff is uninteresting. Pagination then stays sequential,
+        since an early stop makes speculative page fetches wasted
+        requests.
+        """
         if params is None:
             params = {}
         
         params.setdefault('per_page', 100)
         
-        results = []
-        page = 1
+        data, has_next, link = self._get_page(endpoint, params, 1)
+        if not data:
+            return []
+        results = list(data) if isinstance(data, list) else [data]
+        if stop_predicate:
+            for idx, item in enumerate(results):
+                if stop_predicate(item):
+                    return results[:idx]
+        if not has_next or max_pages == 1:
+            return results
+        
+        last_page = None
+        if link:
+            match = _LAST_PAGE_RE.search(link)
+            if match:
+                last_page = int(match.group(1))
+                if max_pages:
+                    last_page = min(last_page, max_pages)
         
-        while True:
+        if last_page and last_page > 1 and not stop_predicate:
+            logger.debug(f"Fetching pages 2-{last_page} of {endpoint} concurrently")
+            with ThreadPoolExecutor(max_workers=min(_PAGE_FETCH_WORKERS, last_page - 1)) as executor:
+                pages = executor.map(
+                    lambda page: self._get_page(endpoint, params, page)[0],
+                    range(2, last_page + 1))
+                for page_data in pages:
+                    if page_data:
+                        results.extend(page_data if isinstance(page_data, list) else [page_data])
+            return results
+        
+        # Sequential walk: page count unknown, or an early stop is likely
+        page = 2
+        while has_next:
             if max_pages and page > max_pages:
                 break
-            
-            params['page'] = page
-            response = self._make_request("GET", endpoint, params=params)
-            data = response.json()
-            
+            data, has_next, _ = self._get_page(endpoint, params, page)
             if not data:
                 break
-            
-            results.extend(data if isinstance(data, list) else [data])
-            
-            # Check if there's a next page
-            if 'Link' not in response.headers:
-                break
-            
-            links = response.headers['Link']
-            if 'rel="next"' not in links:
-                break
-            
+            items = data if isinstance(data, list) else [data]
+            if stop_predicate:
+                for idx, item in enumerate(items):
+                    if stop_predicate(item):
+                        results.extend(items[:idx])
+                        return results
+            results.extend(items)
             page += 1
             logger.debug(f"Fetching page {page} of {endpoint}")
         
@@ -159,21 +319,26 @@ class GitHubClient:
             "direction": "desc",
         }
         
-        prs = self.get_paginated(f"/repos/{owner}/{repo}/pulls", params=params)
+        # The listing is sorted by updated_at descending, so once one PR
+        # falls before `since` every later one does too — stop paginating
+        # there instead of fetching the full history and filtering
+        stop_predicate = None
+        if since:
+            stop_predicate = lambda pr: datetime.fromisoformat(pr['updated_at']) < since
+        
+        prs = self.get_paginated(f"/repos/{owner}/{repo}/pulls", params=params,
+                                 stop_predicate=stop_predicate)
         
-        # Filter by date if specified
-        if since or until:
+        # Filter by date if specified. The since bound was already
+        # enforced during pagination by the stop predicate, so only
+        # until needs a client-side pass — no PR gets parsed twice.
+        if until:
             filtered_prs = []
             for pr in prs:
-                updated_at = datetime.fromisoformat(pr['updated_at'].replace('Z', '+00:00'))
-                
-                if since and updated_at < since:
+                updated_at = datetime.fromisoformat(pr['updated_at'])
+                if updated_at > until:
                     continue
-                if until and updated_at > until:
-                    continue
-                
                 filtered_prs.append(pr)
-            
             return filtered_prs
         
         return prs
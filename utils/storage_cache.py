@@ -0,0 +1,52 @@
+"""
+TTL cache for expensive GCS summary lookups
+
+get_data_summary lists every blob under an organization, an O(N) GCS
+List operation. Dashboards and repeated CLI calls don't need
+second-level freshness, so cache results per organization with a TTL.
+"""
+import time
+import logging
+from typing import Dict, Any
+
+from utils.storage import GCSStorage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 300
+
+# org -> (expiry_monotonic, summary)
+_summary_cache: Dict[str, tuple] = {}
+
+
+def get_data_summary_cached(storage: GCSStorage, org: str,
+                            ttl: float = DEFAULT_TTL_SECONDS,
+                            refresh: bool = False) -> Dict[str, Any]:
+    """
+    Get a data summary, serving from cache when fresh
+
+    Args:
+        storage: GCSStorage instance to query on cache miss
+        org: Organization name
+        ttl: Seconds to serve cached results
+        refresh: Force a fresh listing, bypassing the cache
+
+    Returns:
+        Summary dictionary (see GCSStorage.get_data_summary)
+    """
+    now = time.monotonic()
+
+    if not refresh:
+        cached = _summary_cache.get(org)
+        if cached and cached[0] > now:
+            logger.debug(f"Serving cached data summary for {org}")
+            return cached[1]
+
+    summary = storage.get_data_summary(org)
+    _summary_cache[org] = (now + ttl, summary)
+    return summary
+
+
+def invalidate_summary_cache(org: str):
+    """Drop the cached summary for an organization (e.g. after a wipe)"""
+    _summary_cache.pop(org, None)